@@ -1,8 +1,18 @@
+import json
+import tracemalloc
+
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from calibration import calibrate
 from divergence_model import DivergenceAnalysis
+from montecarlo import run_monte_carlo
+from plotting import depth_trace, downsample_frame
+from profiling import StageProfiler
+from resample import RESAMPLE_METHODS, resample
+from sweep import SWEEP_PARAMS
+from trends import TREND_FILTERS
+from well_io import file_digest, read_well_columns
 
 st.set_page_config(page_title="Anális de divergencia MARL", layout="wide")
 
@@ -22,54 +32,236 @@ with st.sidebar.expander("Parámetros Generales", expanded=True):
     prf = st.number_input("Profundidad de Referencia (PRF)", value=3329.0, step=10.0)
     ms = st.number_input("Profundidad Cambio Calibración (MS)", value=1784.0, step=10.0)
 
+# Trend model parameters live in session_state so the automatic calibration
+# can pre-fill them (see apply_calibration)
+for key, value in {
+    "po": 1.95,
+    "k": 0.01,
+    "c": 0.5,
+    "dtco": 180.0,
+    "c1": -0.0004,
+}.items():
+    st.session_state.setdefault(key, value)
+
 with st.sidebar.expander("Modelo de Densidad (Trougott)", expanded=False):
-    po = st.number_input("Po (Densidad sup)", value=1.95, step=0.01)
-    k = st.number_input("k (Factor)", value=0.01, step=0.001, format="%.4f")
-    c = st.number_input("c (Exponente)", value=0.5, step=0.1)
+    po = st.number_input("Po (Densidad sup)", step=0.01, key="po")
+    k = st.number_input("k (Factor)", step=0.001, format="%.4g", key="k")
+    c = st.number_input("c (Exponente)", step=0.1, key="c")
 
 with st.sidebar.expander("Modelo de Athy (DTN)", expanded=False):
-    dtco = st.number_input("DTCO (Tránsito inicial)", value=180.0, step=1.0)
-    c1 = st.number_input("c1 (Factor exp)", value=-0.0004, step=0.0001, format="%.5f")
+    dtco = st.number_input("DTCO (Tránsito inicial)", step=1.0, key="dtco")
+    c1 = st.number_input("c1 (Factor exp)", step=0.0001, format="%.5f", key="c1")
 
 with st.sidebar.expander("Modelo de Eaton", expanded=False):
     ppn = st.number_input("Ppn (Normal)", value=1.03, step=0.01)
     exp_eaton = st.number_input("Exponente Eaton", value=0.5, step=0.1)
 
+with st.sidebar.expander("Tendencia DTC (DTC Prom)", expanded=False):
+    trend_labels = {
+        "forward": "Media hacia adelante (original)",
+        "centered": "Media centrada",
+        "trailing": "Media hacia atrás",
+        "exponential": "Media exponencial",
+        "median": "Mediana móvil",
+    }
+    trend_method = st.selectbox(
+        "Filtro",
+        list(TREND_FILTERS),
+        format_func=lambda m: trend_labels.get(m, m),
+    )
+    window_in_meters = st.checkbox("Ventana en metros", value=False)
+    if window_in_meters:
+        trend_window = 101
+        trend_window_m = st.number_input(
+            "Ventana (m)", value=100.0, min_value=0.0, step=10.0
+        )
+    else:
+        trend_window = st.number_input(
+            "Ventana (muestras)", value=101, min_value=1, step=10
+        )
+        trend_window_m = None
+    # A regular grid makes the window the same length in meters everywhere
+    resample_step = st.number_input(
+        "Remuestrear cada (m, 0 = sin remuestrear)",
+        value=0.0,
+        min_value=0.0,
+        step=0.5,
+    )
+    resample_labels = {
+        "linear": "Interpolación lineal",
+        "nearest": "Muestra más cercana",
+        "average": "Promedio por bloque",
+    }
+    resample_method = st.selectbox(
+        "Método de remuestreo",
+        RESAMPLE_METHODS,
+        format_func=lambda m: resample_labels.get(m, m),
+        disabled=resample_step == 0,
+    )
+
+with st.sidebar.expander("Incertidumbre (Monte Carlo)", expanded=False):
+    mc_enabled = st.checkbox("Calcular bandas P10/P50/P90", value=False)
+    mc_realizations = st.number_input(
+        "Realizaciones", value=2000, min_value=100, step=500
+    )
+    mc_uncertainty = st.number_input(
+        "Desviación estándar (% del valor)", value=10.0, min_value=0.0, step=1.0
+    )
+    mc_workers = st.number_input(
+        "Procesos (0 = todos los núcleos)", value=1, min_value=0, step=1
+    )
+
+with st.sidebar.expander("Gráficos", expanded=False):
+    # Curves are drawn with WebGL and reduced to the min/max of each depth
+    # bucket, so long wells stay responsive without losing peaks
+    max_points = st.number_input(
+        "Puntos máximos por curva", value=4000, min_value=100, step=500
+    )
+
+show_performance = st.sidebar.checkbox("Mostrar panel de Rendimiento", value=False)
+
+
+def well_columns(file, digest, step=0.0, method="linear"):
+    # (depth, dtc, mw) of the well, on a regular grid every `step` m if > 0
+    depth, dtc, mw = read_well_columns(file, digest=digest)
+    if not step:
+        return depth, dtc, mw
+    grid = resample(depth, {"DTC": dtc, "MW": mw}, step, method)
+    return grid["Depth"].values, grid["DTC"].values, grid["MW"].values
+
+
+def process_data(digest, file, profile=False, step=0.0, method="linear", **params):
+    # The model of the current well is kept in session_state: set_params
+    # plus run_analysis only recompute the stages whose parameters changed
+    # (see DivergenceAnalysis.STAGE_GRAPH). The well columns come from the
+    # well_io cache, so the workbook is never parsed twice.
+    # Returns (results, profiler); the profiler is None unless profile=True.
+    key = (digest, step, method)
+    if st.session_state.get("model_key") != key:
+        depth, dtc, mw = well_columns(file, digest, step, method)
+        st.session_state.model = DivergenceAnalysis.from_arrays(depth, dtc, mw)
+        st.session_state.model_key = key
+    model = st.session_state.model
+    model.set_params(**params)
+    if not profile:
+        return model.run_analysis(), None
+    profiler = StageProfiler()
+    # Trace allocations (NumPy reports to tracemalloc) so the panel can show
+    # each stage's peak memory; only while profiling, as tracing slows the run
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        return model.run_analysis(callbacks=[profiler]), profiler
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+@st.cache_data(show_spinner=False)
+def process_uncertainty(
+    digest, _file, realizations, uncertainty, workers, step, method, **params
+):
+    # Every swept parameter follows a normal distribution centered on the
+    # sidebar value with sd = uncertainty % of that value
+    depth, dtc, mw = well_columns(_file, digest, step, method)
+    model = DivergenceAnalysis.from_arrays(depth, dtc, mw, **params)
+    distributions = {
+        name: ("normal", params[name], abs(params[name]) * uncertainty / 100.0)
+        for name in SWEEP_PARAMS
+    }
+    return run_monte_carlo(
+        model,
+        distributions,
+        realizations=realizations,
+        workers=None if workers == 1 else workers,
+        seed=0,
+        # Long wells are thinned in depth so the histograms stay bounded
+        max_bytes=256 * 2**20,
+    )
+
+
+def upload_digest(file):
+    # Hash each upload only once per session
+    key = getattr(file, "file_id", None) or (file.name, file.size)
+    if st.session_state.get("upload_key") != key:
+        st.session_state.upload_key = key
+        st.session_state.upload_digest = file_digest(file)
+    return st.session_state.upload_digest
+
+
+def apply_calibration(file, rkb, ta, prf, step, method):
+    # Runs before the next rerun, so the fitted values can still be written
+    # into the widgets' session_state
+    try:
+        depth, dtc, mw = well_columns(file, upload_digest(file), step, method)
+        model = DivergenceAnalysis.from_arrays(depth, dtc, mw, rkb=rkb, ta=ta, prf=prf)
+        fit = calibrate(model)
+    except ValueError as e:
+        st.session_state.calibration_error = str(e)
+        return
+    for key in ("po", "k", "c", "dtco", "c1"):
+        st.session_state[key] = fit[key]
+    st.session_state.calibration_error = None
+
+
 # File Uploader
 uploaded_file = st.sidebar.file_uploader("Cargar archivo Excel (Pozo)", type=["xlsx"])
 
 if uploaded_file is not None:
-    try:
-        # Cache the analysis to avoid re-running on simple UI updates if params haven't changed
-        # Note: In Streamlit, caching usually requires hashable args.
-        # Since we have a class, we'll instantiate it inside the app flow or use a wrapper function.
-
-        @st.cache_data
-        def process_data(
-            file, _rkb, _ta, _po, _k, _c, _dtco, _c1, _prf, _ppn, _exp, _ms
-        ):
-            model = DivergenceAnalysis(
-                file,
-                rkb=_rkb,
-                ta=_ta,
-                po=_po,
-                k=_k,
-                c=_c,
-                dtco=_dtco,
-                c1=_c1,
-                prf=_prf,
-                ppn=_ppn,
-                exp_eaton=_exp,
-                ms=_ms,
-            )
-            return model.run_analysis()
+    st.sidebar.button(
+        "Calibrar Athy y Trougott automáticamente",
+        on_click=apply_calibration,
+        args=(uploaded_file, rkb, ta, prf, resample_step, resample_method),
+        help="Ajusta DTCO/c1 a la DTC sobre PRF y Po/k/c a la densidad de Gardner.",
+    )
+    if st.session_state.get("calibration_error"):
+        st.sidebar.warning(
+            f"No se pudo calibrar: {st.session_state.calibration_error}"
+        )
 
+    try:
         # Run analysis
+        params = dict(
+            rkb=rkb,
+            ta=ta,
+            po=po,
+            k=k,
+            c=c,
+            dtco=dtco,
+            c1=c1,
+            prf=prf,
+            ppn=ppn,
+            exp_eaton=exp_eaton,
+            ms=ms,
+            trend_method=trend_method,
+            trend_window=trend_window,
+            trend_window_m=trend_window_m,
+        )
         with st.spinner("Procesando datos y calculando modelos..."):
-            df_results = process_data(
-                uploaded_file, rkb, ta, po, k, c, dtco, c1, prf, ppn, exp_eaton, ms
+            df_results, profiler = process_data(
+                upload_digest(uploaded_file),
+                uploaded_file,
+                profile=show_performance,
+                step=resample_step,
+                method=resample_method,
+                **params,
             )
 
+        df_bands = None
+        if mc_enabled:
+            with st.spinner("Simulando realizaciones Monte Carlo..."):
+                df_bands = process_uncertainty(
+                    upload_digest(uploaded_file),
+                    uploaded_file,
+                    int(mc_realizations),
+                    mc_uncertainty,
+                    int(mc_workers),
+                    resample_step,
+                    resample_method,
+                    **params,
+                )
+
         st.success("Cálculos completados exitosamente.")
 
         # TABS for visualizations
@@ -85,19 +277,13 @@ if uploaded_file is not None:
                 st.subheader("Densidades: Gardner vs Trougott")
                 fig_den = go.Figure()
                 fig_den.add_trace(
-                    go.Scatter(
-                        x=df_results["Rho_Gardner"],
-                        y=df_results["Depth"],
-                        mode="lines",
-                        name="Gardner",
+                    depth_trace(
+                        df_results, "Rho_Gardner", max_points, name="Gardner"
                     )
                 )
                 fig_den.add_trace(
-                    go.Scatter(
-                        x=df_results["Rho_Trougott"],
-                        y=df_results["Depth"],
-                        mode="lines",
-                        name="Trougott",
+                    depth_trace(
+                        df_results, "Rho_Trougott", max_points, name="Trougott"
                     )
                 )
                 fig_den.update_layout(
@@ -113,20 +299,10 @@ if uploaded_file is not None:
                 st.subheader("Tiempo de Tránsito: DTC vs DTN")
                 fig_dt = go.Figure()
                 fig_dt.add_trace(
-                    go.Scatter(
-                        x=df_results["DTC_Prom"],
-                        y=df_results["Depth"],
-                        mode="lines",
-                        name="DTC Prom",
-                    )
+                    depth_trace(df_results, "DTC_Prom", max_points, name="DTC Prom")
                 )
                 fig_dt.add_trace(
-                    go.Scatter(
-                        x=df_results["DTN"],
-                        y=df_results["Depth"],
-                        mode="lines",
-                        name="DTN (Athy)",
-                    )
+                    depth_trace(df_results, "DTN", max_points, name="DTN (Athy)")
                 )
                 fig_dt.update_layout(
                     xaxis_title="Tiempo de Tránsito (µs/ft)",
@@ -141,24 +317,20 @@ if uploaded_file is not None:
         # --- PLOT 2: DIVERGENCE AREA ---
         with tab2:
             st.subheader("Área Divergente")
+            # Same rows for DTN and DTSH so the fill between them stays aligned
+            df_plot = downsample_frame(df_results, ["DTN", "DTSH"], max_points)
             fig_div = go.Figure()
 
             # Fill area
             fig_div.add_trace(
-                go.Scatter(
-                    x=df_results["DTN"],
-                    y=df_results["Depth"],
-                    mode="lines",
-                    line=dict(width=0),
-                    name="DTN",
-                    showlegend=False,
+                depth_trace(
+                    df_plot, "DTN", line=dict(width=0), name="DTN", showlegend=False
                 )
             )
             fig_div.add_trace(
-                go.Scatter(
-                    x=df_results["DTSH"],
-                    y=df_results["Depth"],
-                    mode="lines",
+                depth_trace(
+                    df_plot,
+                    "DTSH",
                     line=dict(width=0),
                     fill="tonextx",
                     fillcolor="rgba(255, 192, 203, 0.5)",  # Pink with alpha
@@ -167,19 +339,8 @@ if uploaded_file is not None:
             )
 
             # Lines on top
-            fig_div.add_trace(
-                go.Scatter(
-                    x=df_results["DTN"], y=df_results["Depth"], mode="lines", name="DTN"
-                )
-            )
-            fig_div.add_trace(
-                go.Scatter(
-                    x=df_results["DTSH"],
-                    y=df_results["Depth"],
-                    mode="lines",
-                    name="DTSH",
-                )
-            )
+            fig_div.add_trace(depth_trace(df_plot, "DTN", name="DTN"))
+            fig_div.add_trace(depth_trace(df_plot, "DTSH", name="DTSH"))
 
             fig_div.update_layout(
                 xaxis_title="Tiempo de Tránsito",
@@ -196,47 +357,89 @@ if uploaded_file is not None:
             st.subheader("Ventana Operativa de Geopresiones")
             fig_win = go.Figure()
 
+            # Uncertainty bands (P10-P90 filled, P50 dotted) behind the curves
+            if df_bands is not None:
+                band_colors = {
+                    "Pp_Uncal": ("Pp Sin Calibrar", "rgba(0, 0, 255, 0.15)"),
+                    "Pp_Cal": ("Pp Calibrada", "rgba(128, 0, 128, 0.15)"),
+                    "Pf": ("Pf", "rgba(0, 128, 0, 0.15)"),
+                }
+                for curve, (label, fill) in band_colors.items():
+                    # P10 and P90 share rows for the fill between them
+                    df_plot = downsample_frame(
+                        df_bands, [f"{curve}_P10", f"{curve}_P90"], max_points
+                    )
+                    fig_win.add_trace(
+                        depth_trace(
+                            df_plot,
+                            f"{curve}_P10",
+                            line=dict(width=0),
+                            showlegend=False,
+                            hoverinfo="skip",
+                        )
+                    )
+                    fig_win.add_trace(
+                        depth_trace(
+                            df_plot,
+                            f"{curve}_P90",
+                            line=dict(width=0),
+                            fill="tonextx",
+                            fillcolor=fill,
+                            name=f"{label} P10-P90",
+                        )
+                    )
+                    fig_win.add_trace(
+                        depth_trace(
+                            df_bands,
+                            f"{curve}_P50",
+                            max_points,
+                            name=f"{label} P50",
+                            line=dict(dash="dot", color=fill.replace("0.15", "1")),
+                        )
+                    )
+
+            # Independent curves: each one is reduced on its own
             fig_win.add_trace(
-                go.Scatter(
-                    x=df_results["GSV"],
-                    y=df_results["Depth"],
-                    mode="lines",
+                depth_trace(
+                    df_results,
+                    "GSV",
+                    max_points,
                     name="Sobrecarga (GSV)",
                     line=dict(color="black"),
                 )
             )
             fig_win.add_trace(
-                go.Scatter(
-                    x=df_results["Pp_Uncal"],
-                    y=df_results["Depth"],
-                    mode="lines",
+                depth_trace(
+                    df_results,
+                    "Pp_Uncal",
+                    max_points,
                     name="Pp Sin Calibrar",
                     line=dict(dash="dash", color="blue"),
                 )
             )
             fig_win.add_trace(
-                go.Scatter(
-                    x=df_results["Pp_Cal"],
-                    y=df_results["Depth"],
-                    mode="lines",
+                depth_trace(
+                    df_results,
+                    "Pp_Cal",
+                    max_points,
                     name="Pp Calibrada",
                     line=dict(color="blue"),
                 )
             )
             fig_win.add_trace(
-                go.Scatter(
-                    x=df_results["Pf"],
-                    y=df_results["Depth"],
-                    mode="lines",
+                depth_trace(
+                    df_results,
+                    "Pf",
+                    max_points,
                     name="Presión Fractura (Pf)",
                     line=dict(color="green"),
                 )
             )
             fig_win.add_trace(
-                go.Scatter(
-                    x=df_results["MW"],
-                    y=df_results["Depth"],
-                    mode="lines",
+                depth_trace(
+                    df_results,
+                    "MW",
+                    max_points,
                     name="Mud Weight (MW)",
                     line=dict(color="brown"),
                 )
@@ -258,6 +461,44 @@ if uploaded_file is not None:
         with st.expander("Ver Tabla de Resultados"):
             st.dataframe(df_results)
 
+        if df_bands is not None:
+            with st.expander("Ver Bandas de Incertidumbre (P10/P50/P90)"):
+                st.dataframe(df_bands)
+
+        # Per-stage timings of the run that produced these results
+        if profiler is not None:
+            with st.expander("Rendimiento", expanded=True):
+                df_perf = profiler.to_frame()
+                df_perf["ms"] = df_perf["seconds"] * 1000
+                df_perf["MB"] = df_perf["allocated_bytes"] / 2**20
+                df_perf["Pico MB"] = pd.to_numeric(df_perf["peak_bytes"]) / 2**20
+                if df_perf.empty:
+                    st.caption(
+                        "Ninguna etapa se recalculó: los resultados ya estaban "
+                        "al día con estos parámetros."
+                    )
+                else:
+                    st.caption(
+                        f"Tiempo total: {df_perf['ms'].sum():.1f} ms · "
+                        f"{len(df_perf)} etapas recalculadas · "
+                        f"{df_perf['rows'].iloc[-1]} filas"
+                    )
+                    st.bar_chart(df_perf.set_index("stage")["ms"])
+                    st.dataframe(df_perf[["stage", "ms", "MB", "Pico MB", "rows"]])
+                col1, col2 = st.columns(2)
+                col1.download_button(
+                    "Descargar JSON",
+                    profiler.to_json(indent=2),
+                    file_name="rendimiento.json",
+                    mime="application/json",
+                )
+                col2.download_button(
+                    "Descargar Chrome trace",
+                    json.dumps(profiler.to_chrome_trace()),
+                    file_name="rendimiento_trace.json",
+                    mime="application/json",
+                )
+
     except Exception as e:
         st.error(f"Error al procesar el archivo: {e}")
 else:
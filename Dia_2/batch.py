@@ -0,0 +1,139 @@
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from divergence_model import DivergenceAnalysis
+
+
+def find_wells(source):
+    """
+    Returns the sorted list of workbooks for a directory or a glob pattern
+    (e.g. 'pozos/' or 'pozos/Pozo_*.xlsx').
+    """
+    if os.path.isdir(source):
+        source = os.path.join(source, "*.xlsx")
+    return sorted(
+        path
+        for path in glob.glob(source)
+        if not os.path.basename(path).startswith("~$")  # Excel lock files
+    )
+
+
+def well_name(path):
+    """Well name from the workbook filename ('Pozo_M1D.xlsx' -> 'Pozo_M1D')."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def well_labels(paths):
+    """
+    {path: label} used in the 'Well' column. The label is the well name,
+    unless two workbooks share it (e.g. pozos/a/Pozo_1.xlsx and
+    pozos/b/Pozo_1.xlsx): then every well is labelled by its path relative
+    to the common directory, without extension ('a/Pozo_1').
+    """
+    names = [well_name(path) for path in paths]
+    if len(set(names)) == len(names):
+        return dict(zip(paths, names))
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    return {
+        path: os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0]
+        .replace(os.sep, "/")
+        for path in paths
+    }
+
+
+def analyze_well(path, params, lean=False):
+    """Runs the divergence model on one workbook (executed in a worker)."""
+    model = DivergenceAnalysis(path, **params)
+    if lean:
+        model.compact()
+        return model.results
+    return model.run_analysis()
+
+
+def run_batch(paths, output=None, workers=None, lean=False, **params):
+    """
+    Runs DivergenceAnalysis on every workbook in `paths` using a process pool
+    with `workers` processes (None = one per CPU).
+
+    Returns (results, failures): a DataFrame with every well stacked under a
+    'Well' column (see well_labels) and a dict {well: error message} for
+    wells that failed.
+    If `output` is given the results are written there as Parquet.
+    lean=True keeps only DivergenceAnalysis.LEAN_COLUMNS in float32 for each
+    well (see DivergenceAnalysis.compact), which cuts the memory of the
+    stacked results by about 70%.
+    """
+    paths = list(dict.fromkeys(paths))  # The same workbook only once
+    labels = well_labels(paths)
+    frames = {}
+    failures = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(analyze_well, path, params, lean): path for path in paths}
+        for future in as_completed(futures):
+            name = labels[futures[future]]
+            try:
+                frames[name] = future.result()
+            except Exception as e:
+                failures[name] = f"{type(e).__name__}: {e}"
+
+    if frames:
+        # Keep the input order regardless of completion order
+        names = [labels[p] for p in paths if labels[p] in frames]
+        results = pd.concat(
+            [frames[name] for name in names],
+            keys=names,
+            names=["Well", None],
+        )
+        results = results.reset_index(level=0).reset_index(drop=True)
+        results["Well"] = results["Well"].astype("category")
+    else:
+        results = pd.DataFrame(columns=["Well"])
+
+    if output is not None:
+        results.to_parquet(output, index=False)
+
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Análisis de divergencia para múltiples pozos."
+    )
+    parser.add_argument("source", help="Directorio o patrón glob de archivos .xlsx")
+    parser.add_argument(
+        "-o", "--output", default="divergencia.parquet", help="Archivo Parquet"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="Número de procesos"
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="Guardar solo GSV, Pp y Pf en float32 (menos memoria)",
+    )
+    args = parser.parse_args(argv)
+
+    paths = find_wells(args.source)
+    if not paths:
+        print(f"No se encontraron pozos en {args.source}", file=sys.stderr)
+        return 1
+
+    results, failures = run_batch(
+        paths, output=args.output, workers=args.workers, lean=args.lean
+    )
+
+    n_ok = len(paths) - len(failures)
+    print(f"{n_ok}/{len(paths)} pozos procesados -> {args.output}")
+    for name, error in failures.items():
+        print(f"ERROR {name}: {error}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
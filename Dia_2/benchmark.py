@@ -0,0 +1,151 @@
+import argparse
+import functools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from divergence_model import DivergenceAnalysis
+from synthetic import synthetic_well
+
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _measure(func, trace_memory):
+    # Returns (seconds, peak bytes allocated during the call)
+    if trace_memory:
+        tracemalloc.reset_peak()
+        start_current = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1] - start_current
+    return elapsed, peak
+
+
+def benchmark_size(n, repeat=3, trace_memory=True, seed=0):
+    """
+    Benchmarks DivergenceAnalysis on a synthetic well of `n` samples.
+    Each _calculate_* stage is timed separately (best of `repeat` runs),
+    plus the full run_analysis with and without the fused path.
+    """
+    well = synthetic_well(n, seed=seed)
+    record = {"samples": n, "stages": {}, "total": {}}
+
+    stage_times = {stage: [] for stage in DivergenceAnalysis.STAGES}
+    stage_peaks = {stage: 0 for stage in DivergenceAnalysis.STAGES}
+    for _ in range(repeat):
+        model = DivergenceAnalysis.from_frame(well)
+        for stage in DivergenceAnalysis.STAGES:
+            elapsed, peak = _measure(getattr(model, stage), trace_memory)
+            stage_times[stage].append(elapsed)
+            if peak is not None:
+                stage_peaks[stage] = max(stage_peaks[stage], peak)
+
+    for stage in DivergenceAnalysis.STAGES:
+        record["stages"][stage] = {
+            "seconds": min(stage_times[stage]),
+            "peak_bytes": stage_peaks[stage] if trace_memory else None,
+        }
+
+    for label, kwargs in (("run_analysis", {}), ("run_analysis_fused", {"fused": True})):
+        times, peak = [], None
+        for _ in range(repeat):
+            model = DivergenceAnalysis.from_frame(well)
+            run = functools.partial(model.run_analysis, **kwargs)
+            elapsed, p = _measure(run, trace_memory)
+            times.append(elapsed)
+            peak = p if peak is None else max(peak, p)
+            del model, run
+        record["total"][label] = {"seconds": min(times), "peak_bytes": peak}
+
+    return record
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3, trace_memory=True):
+    """Runs benchmark_size for every size and returns the full report."""
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        results = []
+        for n in sizes:
+            print(f"Benchmark {n:>12,} muestras...", file=sys.stderr)
+            results.append(benchmark_size(n, repeat, trace_memory))
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark del modelo de divergencia con pozos sintéticos."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="Número de muestras de cada pozo sintético",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones")
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="No medir memoria pico (tracemalloc añade algo de sobrecosto)",
+    )
+    parser.add_argument(
+        "-o", "--output", default="benchmark.json", help="Archivo JSON de salida"
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.repeat, not args.no_memory)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for result in report["results"]:
+        total = result["total"]["run_analysis"]["seconds"]
+        fused = result["total"]["run_analysis_fused"]["seconds"]
+        print(
+            f"{result['samples']:>12,} muestras: "
+            f"{total:8.4f} s (fusionado {fused:8.4f} s)"
+        )
+    print(f"Resultados en {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
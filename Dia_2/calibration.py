@@ -0,0 +1,124 @@
+import numpy as np
+
+
+def fit_athy(depth, dtc, z, prf):
+    """
+    Fits the Athy normal-compaction trend DTN = dtco * exp(c1 * (depth - z))
+    to the DTC samples above the reference depth `prf`.
+    ln(DTC) is linear in depth, so the fit is a closed-form least squares.
+    Returns {"dtco": ..., "c1": ..., "rmse": ..., "samples": ...}.
+    """
+    depth = np.asarray(depth, dtype=float)
+    dtc = np.asarray(dtc, dtype=float)
+    mask = (depth < prf) & np.isfinite(depth) & np.isfinite(dtc) & (dtc > 0)
+    if mask.sum() < 2:
+        raise ValueError("Not enough valid DTC samples above PRF to fit Athy.")
+
+    x = depth[mask] - z
+    y = np.log(dtc[mask])
+    x_mean, y_mean = x.mean(), y.mean()
+    dx = x - x_mean
+    c1 = np.dot(dx, y - y_mean) / np.dot(dx, dx)
+    ln_dtco = y_mean - c1 * x_mean
+
+    residual = dtc[mask] - np.exp(ln_dtco + c1 * x)
+    return {
+        "dtco": float(np.exp(ln_dtco)),
+        "c1": float(c1),
+        "rmse": float(np.sqrt(np.mean(residual**2))),
+        "samples": int(mask.sum()),
+    }
+
+
+def _trougott_linear_fit(term, rho, exponents):
+    # For a fixed exponent c, rho = po + k * term**c is linear in (po, k).
+    # Solve that 2-parameter least squares for every c at once using sums
+    # over depth of the (n, len(exponents)) matrix T = term**c.
+    t = term[:, None] ** exponents
+    n = len(rho)
+    st = t.sum(axis=0)
+    stt = np.einsum("ij,ij->j", t, t)
+    str_ = t.T @ rho
+    sr = rho.sum()
+    srr = np.dot(rho, rho)
+
+    var_t = stt - st**2 / n
+    cov = str_ - st * sr / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        k = cov / var_t
+        po = (sr - k * st) / n
+        sse = (srr - sr**2 / n) - cov * k
+    sse = np.where(np.isfinite(sse), sse, np.inf)
+    return po, k, sse
+
+
+def fit_trougott(
+    depth, rho, z, c_range=(0.05, 2.0), points=64, refinements=3, max_bytes=64 * 2**20
+):
+    """
+    Fits the Trougott density trend rho = po + k * (depth - z)^c to `rho`
+    (normally Rho_Gardner) by nonlinear least squares.
+
+    po and k are solved in closed form for a whole vector of exponents c at
+    once; the exponent grid is then narrowed around the best value
+    `refinements` times. Exponents are processed in chunks so the
+    depth x exponent matrix stays near `max_bytes`.
+    Returns {"po": ..., "k": ..., "c": ..., "rmse": ..., "samples": ...}.
+    """
+    depth = np.asarray(depth, dtype=float)
+    rho = np.asarray(rho, dtype=float)
+    mask = np.isfinite(depth) & np.isfinite(rho) & (depth > z)
+    if mask.sum() < 3:
+        raise ValueError("Not enough valid density samples below z to fit Trougott.")
+
+    term = depth[mask] - z
+    rho = rho[mask]
+    chunk = max(1, int(max_bytes // (8 * len(term))))
+
+    lo, hi = c_range
+    best = None
+    for _ in range(refinements + 1):
+        exponents = np.linspace(lo, hi, points)
+        for start in range(0, points, chunk):
+            c = exponents[start : start + chunk]
+            po, k, sse = _trougott_linear_fit(term, rho, c)
+            i = int(np.argmin(sse))
+            if best is None or sse[i] < best[3]:
+                best = (po[i], k[i], c[i], sse[i])
+        step = (hi - lo) / (points - 1)
+        lo = max(best[2] - step, c_range[0])
+        hi = min(best[2] + step, c_range[1])
+
+    po, k, c, sse = best
+    return {
+        "po": float(po),
+        "k": float(k),
+        "c": float(c),
+        "rmse": float(np.sqrt(max(sse, 0.0) / len(rho))),
+        "samples": int(mask.sum()),
+    }
+
+
+def calibrate(model):
+    """
+    Fits both trend models for a DivergenceAnalysis in a single pass over
+    its data, using the model's z and prf. Returns a dict with the fitted
+    dtco, c1, po, k and c plus the fit diagnostics of each model.
+    """
+    model._calculate_vp()
+    model._calculate_gardner_density()
+    results = model.results
+
+    athy = fit_athy(results["Depth"].values, results["DTC"].values, model.z, model.prf)
+    trougott = fit_trougott(
+        results["Depth"].values, results["Rho_Gardner"].values, model.z
+    )
+    return {
+        "dtco": athy["dtco"],
+        "c1": athy["c1"],
+        "po": trougott["po"],
+        "k": trougott["k"],
+        "c": trougott["c"],
+        "athy": athy,
+        "trougott": trougott,
+    }
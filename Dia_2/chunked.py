@@ -0,0 +1,112 @@
+import os
+
+from incremental import IncrementalDivergenceAnalysis
+from trends import window_samples
+from well_io import read_well_columns
+
+
+# Samples read from disk per block
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def iter_chunks(depth, dtc, mw, chunk_size=DEFAULT_CHUNK_SIZE, **params):
+    """
+    Runs DivergenceAnalysis over (depth, dtc, mw) one depth block at a time
+    and yields the result rows of each block as a DataFrame.
+
+    The arrays are only sliced, so memory-mapped columns (see
+    well_io.load_columns) are read from disk block by block. Between blocks
+    only the DTC trend halo (the samples the filter reads beyond the block,
+    100 for the default forward window) and the running maximum of
+    Div_DT_Ratio are carried over, through IncrementalDivergenceAnalysis.
+    Concatenating the blocks gives exactly the table of run_analysis() on
+    the whole well for the forward and median trends; the cumulative-sum
+    filters (trailing, centered) agree to floating-point rounding.
+    """
+    if params.get("trend_window_m") is not None:
+        # Same conversion as the in-memory run (first/last depth only)
+        params["trend_window"] = window_samples(depth, params.pop("trend_window_m"))
+    model = IncrementalDivergenceAnalysis(**params)
+    for start in range(0, len(depth), chunk_size):
+        stop = start + chunk_size
+        block = model.append(depth[start:stop], dtc[start:stop], mw[start:stop])
+        if len(block):
+            yield block
+    block = model.flush()
+    if len(block):
+        yield block
+
+
+class _ParquetSink:
+    # One row group per block; pyarrow is imported only when needed
+    def __init__(self, output):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._pq = pq
+        self.output = output
+        self.writer = None
+
+    def write(self, block):
+        table = self._pa.Table.from_pandas(block, preserve_index=False)
+        if self.writer is None:
+            self.writer = self._pq.ParquetWriter(self.output, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _CsvSink:
+    def __init__(self, output):
+        self.output = output
+        self.header = True
+
+    def write(self, block):
+        block.to_csv(self.output, index=False, header=self.header, mode="a")
+        self.header = False
+
+    def close(self):
+        pass
+
+
+def run_chunked(
+    source, output, chunk_size=DEFAULT_CHUNK_SIZE, fmt=None, columns=None, **params
+):
+    """
+    Out-of-core analysis of a well. `source` is a workbook (stored once in
+    the on-disk column cache of well_io and then memory-mapped) or a
+    (depth, dtc, mw) tuple of arrays. Each block of results is appended to
+    `output` as soon as it is computed: a Parquet file (one row group per
+    block) or CSV, chosen by `fmt` or the file extension. `output` may
+    also be an open binary/text stream, e.g. stdout. `columns` restricts
+    the written columns.
+
+    Returns the number of rows written.
+    """
+    if isinstance(source, tuple):
+        depth, dtc, mw = source
+    else:
+        depth, dtc, mw = read_well_columns(source)
+
+    if fmt is None:
+        ext = os.path.splitext(str(output))[1].lower()
+        fmt = "parquet" if ext == ".parquet" else "csv"
+    if isinstance(output, (str, os.PathLike)) and os.path.exists(output):
+        os.remove(output)
+    sink = _ParquetSink(output) if fmt == "parquet" else _CsvSink(output)
+
+    rows = 0
+    try:
+        for block in iter_chunks(depth, dtc, mw, chunk_size, **params):
+            if columns is not None:
+                missing = [col for col in columns if col not in block.columns]
+                if missing:
+                    raise ValueError(f"Unknown columns: {', '.join(missing)}")
+            sink.write(block if columns is None else block[columns])
+            rows += len(block)
+    finally:
+        sink.close()
+    return rows
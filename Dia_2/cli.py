@@ -0,0 +1,196 @@
+"""
+Headless command line entry point for DivergenceAnalysis.
+
+    python cli.py Pozo_L2DL.xlsx --ppn 1.05 -o resultados.parquet
+    python cli.py Pozo_L2DL.xlsx --config params.toml > resultados.csv
+
+Only NumPy, pandas and the model modules are imported (no plotly,
+streamlit or matplotlib), so it starts quickly in cron and batch jobs.
+Parameters are taken from the model defaults, then the config file
+(JSON or TOML, one key per parameter), then the command line flags.
+"""
+
+import argparse
+import inspect
+import json
+import os
+import sys
+
+from chunked import run_chunked
+from divergence_model import DivergenceAnalysis
+from trends import trend_extent
+from well_io import read_well, read_well_columns
+
+
+FORMATS = ("csv", "parquet")
+
+# Every other model parameter is a float
+PARAM_TYPES = {"trend_method": str, "trend_window": int}
+
+
+def model_defaults():
+    """Default value of every DivergenceAnalysis parameter."""
+    signature = inspect.signature(DivergenceAnalysis.__init__)
+    return {name: signature.parameters[name].default for name in DivergenceAnalysis.PARAMS}
+
+
+def result_columns():
+    """Columns of the results table, in order."""
+    graph = DivergenceAnalysis.STAGE_GRAPH
+    outputs = [col for _, _, cols in graph.values() for col in cols]
+    return ["Depth", "DTC", "MW", *outputs]
+
+
+def load_config(path):
+    """Reads model parameters from a JSON or TOML file."""
+    with open(path, "rb") as f:
+        if path.endswith(".toml"):
+            import tomllib
+
+            config = tomllib.load(f)
+        else:
+            config = json.load(f)
+    unknown = set(config) - set(DivergenceAnalysis.PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown parameters in {path}: {', '.join(sorted(unknown))}")
+    return config
+
+
+def output_format(output, requested=None):
+    """Format given with --format, else inferred from the output extension."""
+    if requested:
+        return requested
+    if output != "-" and os.path.splitext(output)[1].lower() == ".parquet":
+        return "parquet"
+    return "csv"
+
+
+def write_results(df, output="-", fmt="csv"):
+    """Writes the results to a file or, with output='-', to stdout."""
+    if fmt == "parquet":
+        target = sys.stdout.buffer if output == "-" else output
+        df.to_parquet(target, index=False)
+    else:
+        target = sys.stdout if output == "-" else output
+        # Written in chunks so large wells do not need the whole text in memory
+        df.to_csv(target, index=False, chunksize=100_000)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Método de divergencia (presión de poro y fractura) sin interfaz gráfica."
+    )
+    parser.add_argument(
+        "well", help="Archivo Excel del pozo (Profundidad, DTC, MW); '-' lee de stdin"
+    )
+    parser.add_argument("-c", "--config", help="Parámetros del modelo en JSON o TOML")
+    parser.add_argument(
+        "-o", "--output", default="-", help="Archivo de salida ('-' = stdout)"
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=FORMATS,
+        help="Formato de salida (por defecto según la extensión, si no CSV)",
+    )
+    parser.add_argument("--columns", nargs="+", help="Columnas a exportar")
+    parser.add_argument(
+        "--fused", action="store_true", help="Usar el cálculo fusionado (un solo buffer)"
+    )
+    parser.add_argument(
+        "--jit", action="store_true", help="Compilar el cálculo fusionado con numba"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Procesar por bloques de N muestras desde disco y escribir cada bloque",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="No usar la caché en disco de pozos ya leídos",
+    )
+
+    params = parser.add_argument_group("parámetros del modelo")
+    for name, default in model_defaults().items():
+        params.add_argument(
+            f"--{name.replace('_', '-')}",
+            dest=name,
+            type=PARAM_TYPES.get(name, float),
+            default=None,
+            help=f"(por defecto {default})",
+        )
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    params = model_defaults()
+    if args.config:
+        params.update(load_config(args.config))
+    params.update(
+        {name: getattr(args, name) for name in params if getattr(args, name) is not None}
+    )
+    if args.chunk_size:
+        # The chunked run always streams from the on-disk cache through the
+        # incremental model, which needs a filter with a finite window
+        ignored = [
+            flag
+            for flag, used in (
+                ("--fused", args.fused),
+                ("--jit", args.jit),
+                ("--no-cache", args.no_cache),
+            )
+            if used
+        ]
+        if ignored:
+            parser.error(f"--chunk-size no admite {', '.join(ignored)}")
+        try:
+            trend_extent(params["trend_method"], params["trend_window"])
+        except ValueError:
+            parser.error(
+                f"--chunk-size no admite el filtro '{params['trend_method']}' "
+                "(necesita una ventana finita)"
+            )
+
+    try:
+        return run(args, params)
+    except BrokenPipeError:
+        # Output piped into e.g. `head`, which stopped reading
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+
+def run(args, params):
+    if args.columns:
+        missing = [col for col in args.columns if col not in result_columns()]
+        if missing:
+            print(f"Columnas desconocidas: {', '.join(missing)}", file=sys.stderr)
+            return 2
+
+    source = sys.stdin.buffer.read() if args.well == "-" else args.well
+    fmt = output_format(args.output, args.format)
+    if args.chunk_size:
+        if args.output == "-":
+            output = sys.stdout.buffer if fmt == "parquet" else sys.stdout
+        else:
+            output = args.output
+        run_chunked(source, output, args.chunk_size, fmt, args.columns, **params)
+        return 0
+
+    if args.no_cache:
+        model = DivergenceAnalysis.from_frame(read_well(source), **params)
+    else:
+        model = DivergenceAnalysis.from_arrays(*read_well_columns(source), **params)
+    results = model.run_analysis(fused=args.fused or args.jit, jit=args.jit)
+    if args.columns:
+        results = results[args.columns]
+
+    write_results(results, args.output, fmt)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
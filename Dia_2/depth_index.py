@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+
+def _sparse_table(values, ufunc):
+    # Row k holds ufunc over the 2**k samples starting at each position
+    # (padded with NaN past the end). Missing samples are ignored by
+    # fmin/fmax, so an interval is only missing when all its samples are.
+    n = len(values)
+    levels = max(int(n).bit_length(), 1)
+    table = np.full((levels, n), np.nan)
+    table[0] = values
+    for k in range(1, levels):
+        half = 1 << (k - 1)
+        table[k, : n - half] = ufunc(table[k - 1, : n - half], table[k - 1, half:])
+    return table
+
+
+class DepthIndex:
+    """
+    Point and interval queries over a results frame sorted by depth.
+
+    Depths are located by binary search (np.searchsorted). Interval minimum
+    and maximum use a sparse table per column (O(1) per query after an
+    O(n log n) build); sum, mean and count use prefix sums. Tables are built
+    the first time a column is queried and reused afterwards.
+
+        index = model.depth_index()
+        index.at(3450, ["Pp_Cal", "Pf"])
+        index.interval(3000, 3500, "Pf", how="min")
+
+    Every query also accepts arrays of depths and returns one row per query.
+    """
+
+    AGGREGATES = ("min", "max", "mean", "sum", "count")
+
+    def __init__(self, frame, depth_column="Depth"):
+        self.frame = frame
+        self.depth_column = depth_column
+        self.depth = np.asarray(frame[depth_column], dtype=float)
+        if np.any(np.diff(self.depth) < 0):
+            raise ValueError(f"'{depth_column}' must be sorted in increasing order.")
+        self._tables = {}
+
+    def _columns(self, columns):
+        if columns is None:
+            return [col for col in self.frame.columns if col != self.depth_column]
+        if isinstance(columns, str):
+            return [columns]
+        return list(columns)
+
+    def _values(self, column):
+        return np.asarray(self.frame[column], dtype=float)
+
+    def _table(self, column, how):
+        key = (column, "minmax" if how in ("min", "max") else "prefix")
+        if key not in self._tables:
+            values = self._values(column)
+            if key[1] == "minmax":
+                self._tables[key] = {
+                    "min": _sparse_table(values, np.fmin),
+                    "max": _sparse_table(values, np.fmax),
+                }
+            else:
+                missing = np.isnan(values)
+                self._tables[key] = {
+                    "sum": np.concatenate(([0.0], np.cumsum(np.where(missing, 0, values)))),
+                    "count": np.concatenate(([0], np.cumsum(~missing))),
+                }
+        return self._tables[key]
+
+    def at(self, depth, columns=None):
+        """
+        Values of `columns` at `depth`, linearly interpolated between the
+        two nearest samples (missing outside the logged interval). A scalar
+        depth returns a Series; an array returns a DataFrame.
+        """
+        columns = self._columns(columns)
+        query = np.atleast_1d(np.asarray(depth, dtype=float))
+        out = {self.depth_column: query}
+        for col in columns:
+            if not len(self.depth):
+                # No samples: every depth is outside the logged interval
+                out[col] = np.full(len(query), np.nan)
+                continue
+            out[col] = np.interp(
+                query, self.depth, self._values(col), left=np.nan, right=np.nan
+            )
+        result = pd.DataFrame(out)
+        return result.iloc[0] if np.ndim(depth) == 0 else result
+
+    def interval(self, top, base, columns=None, how="min"):
+        """
+        Aggregates `columns` over the samples with top <= depth <= base.
+        `how` is one of min, max, mean, sum or count; missing samples are
+        ignored and an interval without samples gives NaN (count 0).
+        Scalar bounds return a Series; arrays return a DataFrame with Top,
+        Base and one column per curve.
+        """
+        if how not in self.AGGREGATES:
+            raise ValueError(f"Unknown aggregate '{how}'. Use one of {self.AGGREGATES}.")
+        columns = self._columns(columns)
+        top_q, base_q = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(top, dtype=float)),
+            np.atleast_1d(np.asarray(base, dtype=float)),
+        )
+        start = np.searchsorted(self.depth, top_q, side="left")
+        stop = np.searchsorted(self.depth, base_q, side="right")
+        length = np.maximum(stop - start, 0)
+        empty = length == 0
+
+        out = {"Top": top_q, "Base": base_q}
+        if how in ("min", "max") and not len(self.depth):
+            # No samples: every interval is empty
+            for col in columns:
+                out[col] = np.full(len(top_q), np.nan)
+        elif how in ("min", "max"):
+            # Two overlapping power-of-two blocks cover [start, stop)
+            level = np.maximum(length, 1)
+            level = np.frexp(level)[1] - 1
+            right = np.maximum(stop - (1 << level), 0)
+            left = np.minimum(start, len(self.depth) - 1)
+            ufunc = np.fmin if how == "min" else np.fmax
+            for col in columns:
+                table = self._table(col, how)[how]
+                values = ufunc(table[level, left], table[level, right])
+                values[empty] = np.nan
+                out[col] = values
+        else:
+            for col in columns:
+                prefix = self._table(col, how)
+                count = np.where(empty, 0, prefix["count"][stop] - prefix["count"][start])
+                if how == "count":
+                    out[col] = count
+                    continue
+                total = prefix["sum"][stop] - prefix["sum"][start]
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    values = total / count if how == "mean" else total
+                values = np.where(count > 0, values, np.nan)
+                out[col] = values
+
+        result = pd.DataFrame(out)
+        if np.ndim(top) == 0 and np.ndim(base) == 0:
+            return result.iloc[0]
+        return result
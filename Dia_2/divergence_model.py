@@ -1,8 +1,96 @@
+import time
+
 import pandas as pd
 import numpy as np
 
+from depth_index import DepthIndex
+from fused import run_fused
+from profiling import frame_bytes, run_stage
+from trends import compute_trend, window_samples
+
+
+def running_max(values, initial=None):
+    """
+    Running maximum with the semantics of the original Div_DT_Ratio loop:
+    a missing ratio keeps the previous value, and if the first value is
+    missing the result stays missing. `initial` seeds the maximum with the
+    value carried over from previous samples. 2D input is accumulated along
+    the depth axis (axis 0), one column per scenario.
+    """
+    values = np.asarray(values, dtype=float)
+    if initial is not None:
+        seed = np.broadcast_to(initial, (1,) + values.shape[1:])
+        values = np.concatenate((seed, values))
+    if not len(values):
+        return values.copy()
+    out = np.fmax.accumulate(values, axis=0)
+    out[np.broadcast_to(np.isnan(values[0]), out.shape)] = np.nan
+    return out[1:] if initial is not None else out
+
 
 class DivergenceAnalysis:
+    # Dependency graph of the pipeline, in execution order:
+    # stage -> (parameters it reads, result columns it reads, columns it writes)
+    # run_analysis only reruns a stage when one of its parameters changed or
+    # one of its input columns was recomputed.
+    STAGE_GRAPH = {
+        "_calculate_vp": ((), ("DTC",), ("Vp",)),
+        "_calculate_gardner_density": ((), ("Vp",), ("Rho_Gardner",)),
+        "_calculate_trougott_density": (
+            ("z", "po", "k", "c"),
+            ("Depth",),
+            ("Rho_Trougott",),
+        ),
+        "_calculate_overburden": (("po", "k", "c"), ("Depth",), ("SV", "GSV")),
+        "_calculate_dtc_trend": (
+            ("trend_method", "trend_window", "trend_window_m"),
+            ("DTC",),
+            ("DTC_Prom",),
+        ),
+        "_calculate_dtn": (("z", "dtco", "c1"), ("Depth",), ("DTN",)),
+        "_calculate_divergence": (
+            ("prf",),
+            ("Depth", "DTC_Prom", "DTN"),
+            ("Div_DT_Ratio", "Div_Factor", "DTSH"),
+        ),
+        "_calculate_pore_pressure": (
+            ("ppn", "exp_eaton"),
+            ("GSV", "DTN", "DTSH"),
+            ("Pp_Uncal",),
+        ),
+        "_calculate_calibrated_pressure": (
+            ("ms",),
+            ("Depth", "MW", "Pp_Uncal"),
+            ("Pp_Cal",),
+        ),
+        "_calculate_fracture_pressure": (
+            (),
+            ("Depth", "GSV", "Pp_Uncal"),
+            ("Param_V", "Pf"),
+        ),
+    }
+    # Pipeline stages, in execution order
+    STAGES = tuple(STAGE_GRAPH)
+    # Operational window curves kept by compact() unless told otherwise
+    LEAN_COLUMNS = ("GSV", "Pp_Uncal", "Pp_Cal", "Pf")
+    # Parameters accepted by the constructor and set_params
+    PARAMS = (
+        "rkb",
+        "ta",
+        "po",
+        "k",
+        "c",
+        "dtco",
+        "c1",
+        "prf",
+        "ppn",
+        "exp_eaton",
+        "ms",
+        "trend_method",
+        "trend_window",
+        "trend_window_m",
+    )
+
     def __init__(
         self,
         data_file,
@@ -17,9 +105,16 @@ class DivergenceAnalysis:
         ppn=1.03,
         exp_eaton=0.5,
         ms=1784,
+        trend_method="forward",
+        trend_window=101,
+        trend_window_m=None,
     ):
         """
         Initializes the DivergenceAnalysis class with data and parameters.
+        trend_method/trend_window select the filter used for DTC_Prom
+        (see trends.TREND_FILTERS); the defaults reproduce the original script.
+        trend_window_m, when given, sets the window in meters instead of
+        samples (see trends.window_samples).
         """
         self.rkb = rkb
         self.ta = ta
@@ -33,6 +128,13 @@ class DivergenceAnalysis:
         self.ppn = ppn
         self.exp_eaton = exp_eaton
         self.ms = ms
+        self.trend_method = trend_method
+        self.trend_window = trend_window
+        self.trend_window_m = trend_window_m
+        # Parameter values each stage was last computed with
+        self._stage_keys = {}
+        # Precision loss of the last compact(), None outside lean mode
+        self.precision_report = None
 
         # Load data
         # Expecting 'Pozo_L2DL.xlsx' structure: Col A=Depth, Col B=DTC, Col C=MW
@@ -43,7 +145,43 @@ class DivergenceAnalysis:
         # Wait, the script reads 'Pozo_L2DL.xlsx' for depth, but commented out lines for 'Pozo_M1D.xlsx' for dtc and MW.
         # But later it loops over 'dtc'.
         # I will assume the uploaded file has all 3 columns in the first sheet.
-        self.df = pd.read_excel(data_file)
+        self._load_data(data_file)
+
+    @classmethod
+    def from_frame(cls, df, **params):
+        """
+        Builds the analysis from an already loaded DataFrame whose first three
+        columns are Depth, DTC and MW (no Excel parsing).
+        """
+        return cls(df, **params)
+
+    @classmethod
+    def from_arrays(cls, depth, dtc, mw, **params):
+        """
+        Builds the analysis from depth, DTC and MW arrays. The arrays are not
+        copied, so read-only memory maps (see well_io) can be passed directly.
+        """
+        df = pd.DataFrame({"Depth": depth, "DTC": dtc, "MW": mw}, copy=False)
+        return cls(df, **params)
+
+    def set_params(self, **params):
+        """
+        Updates model parameters. The next run_analysis only recomputes the
+        stages that read them and the stages downstream of those.
+        """
+        for name, value in params.items():
+            if name not in self.PARAMS:
+                raise TypeError(f"Unknown parameter '{name}'.")
+            setattr(self, name, value)
+        self.z = self.ta + self.rkb
+
+    def _load_data(self, data_file):
+        """Reads the well workbook and prepares the results frame."""
+        # data_file can also be a DataFrame that was already loaded
+        if isinstance(data_file, pd.DataFrame):
+            self.df = data_file
+        else:
+            self.df = pd.read_excel(data_file)
         # Standardize column access by index to be safe
         self.depth = self.df.iloc[:, 0].values  # Array for faster ops
         self.dtc = self.df.iloc[:, 1].values
@@ -54,21 +192,121 @@ class DivergenceAnalysis:
         # So input is DTC (transit time).
 
         self.results = pd.DataFrame(
-            {"Depth": self.depth, "DTC": self.dtc, "MW": self.mw}
+            {"Depth": self.depth, "DTC": self.dtc, "MW": self.mw}, copy=False
         )
 
-    def run_analysis(self):
-        """Executes the full analysis pipeline."""
-        self._calculate_vp()
-        self._calculate_gardner_density()
-        self._calculate_trougott_density()
-        self._calculate_overburden()
-        self._calculate_trends()
-        self._calculate_divergence()
-        self._calculate_pore_pressure()
-        self._calculate_fracture_pressure()
+    def run_analysis(self, fused=False, jit=False, callbacks=None):
+        """
+        Executes the full analysis pipeline.
+        fused=True computes every column into one preallocated buffer
+        (see fused.py); jit=True additionally compiles that kernel with numba.
+        callbacks: functions called after each stage with its timing record
+        (see profiling.StageProfiler). Without callbacks nothing is measured.
+        """
+        if self.precision_report is not None:
+            # Leaving lean mode: every column is rebuilt in float64
+            self.results = self.results[["Depth", "DTC", "MW"]]
+            self.precision_report = None
+
+        if callbacks:
+            return self._run_profiled(fused, jit, callbacks)
+
+        if fused:
+            stale = self._stale_stages()
+            self.results = run_fused(self, jit=jit)
+            # The fused kernel recomputed every stage for the current params
+            self._stage_keys.update(stale)
+            return self.results
+
+        for stage, key in self._stale_stages():
+            getattr(self, stage)()
+            self._stage_keys[stage] = key
         return self.results
 
+    def _run_profiled(self, fused, jit, callbacks):
+        origin = time.perf_counter()
+        if fused:
+            stale = self._stale_stages()
+
+            def fused_stage():
+                self.results = run_fused(self, jit=jit)
+
+            run_stage(self, "run_fused", fused_stage, callbacks, origin)
+            self._stage_keys.update(stale)
+        else:
+            for stage, key in self._stale_stages():
+                run_stage(self, stage, getattr(self, stage), callbacks, origin)
+                self._stage_keys[stage] = key
+        return self.results
+
+    def depth_index(self):
+        """
+        DepthIndex over the current results for point and interval queries
+        (e.g. Pf at 3450 m, minimum Pf between 3000 and 3500 m). It is
+        rebuilt only when the results change.
+        """
+        key = (self.results, tuple(self._stage_keys.items()))
+        cached = getattr(self, "_depth_index", None)
+        if cached is None or cached[0][0] is not key[0] or cached[0][1] != key[1]:
+            self._depth_index = (key, DepthIndex(self.results))
+        return self._depth_index[1]
+
+    def compact(self, columns=LEAN_COLUMNS, dtype=np.float32):
+        """
+        Lean mode for holding many wells at once. Keeps the source arrays
+        (Depth/DTC/MW, float64, shared with the results frame) and only the
+        result `columns`, stored as `dtype`; the loaded table and every other
+        derived column are dropped. Missing results are computed first.
+
+        Returns the measured precision loss of each kept column against
+        float64 (also stored in self.precision_report). A later
+        run_analysis recomputes every stage in float64.
+        """
+        self.run_analysis()
+        before = frame_bytes(self.results)
+
+        compact = {"Depth": self.depth, "DTC": self.dtc, "MW": self.mw}
+        report = {}
+        for col in columns:
+            exact = self.results[col].to_numpy(dtype=np.float64)
+            compact[col] = exact.astype(dtype)
+            error = np.abs(compact[col] - exact)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                relative = error / np.abs(exact)
+            report[col] = {
+                "dtype": np.dtype(dtype).name,
+                "max_abs_error": np.nanmax(error, initial=0.0),
+                "max_rel_error": np.nanmax(
+                    relative[np.isfinite(relative)], initial=0.0
+                ),
+            }
+
+        self.df = None
+        self.results = pd.DataFrame(compact, copy=False)
+        self.precision_report = pd.DataFrame.from_dict(report, orient="index")
+        self.precision_report.attrs["bytes_before"] = before
+        self.precision_report.attrs["bytes_after"] = frame_bytes(self.results)
+        return self.precision_report
+
+    def _stale_stages(self):
+        """
+        Returns [(stage, parameter key)] for the stages that must run: those
+        never computed on the current results, whose parameters changed, or
+        that read a column produced by another stale stage.
+        """
+        stale = []
+        recomputed = set()
+        for stage, (params, inputs, outputs) in self.STAGE_GRAPH.items():
+            key = tuple(getattr(self, name) for name in params)
+            if (
+                self._stage_keys.get(stage) != key
+                or recomputed.intersection(inputs)
+                or not all(col in self.results.columns for col in outputs)
+            ):
+                stale.append((stage, key))
+                recomputed.update(outputs)
+        return stale
+
     def _calculate_vp(self):
         # VP = 304878.05 / DTC
         self.results["Vp"] = 304878.05 / self.results["DTC"]
@@ -116,23 +354,32 @@ class DivergenceAnalysis:
         self.results["GSV"] = sv / (depths * 1.422)
 
     def _calculate_trends(self):
+        self._calculate_dtc_trend()
+        self._calculate_dtn()
+
+    def _calculate_dtc_trend(self):
         # DTC Prom: Moving average window of ~100 size forward looking?
         # Script: range(len), end = min(i + 101, len), mean
+        # The default "forward" filter keeps that definition exactly.
 
-        dtc = self.results["DTC"].values
-        dtc_prom = []
-        n = len(dtc)
-        for i in range(n):
-            end = min(i + 101, n)
-            dtc_prom.append(np.mean(dtc[i:end]))
-        self.results["DTC_Prom"] = dtc_prom
+        self.results["DTC_Prom"] = self._dtc_trend(self.results["DTC"].values)
 
+    def _calculate_dtn(self):
         # DTN (Athy)
         # dtn = dtco * exp(c1 * (i - z))
         self.results["DTN"] = self.dtco * np.exp(
             self.c1 * (self.results["Depth"] - self.z)
         )
 
+    def _dtc_trend(self, dtc, out=None):
+        return compute_trend(dtc, self.trend_method, self.trend_samples(), out=out)
+
+    def trend_samples(self):
+        """DTC trend window in samples (converted from trend_window_m if set)."""
+        if self.trend_window_m is None:
+            return self.trend_window
+        return window_samples(self.depth, self.trend_window_m)
+
     def _calculate_divergence(self):
         # Logic:
         # lista_divdt = [dtc_prom[0]/dtn[0]]
@@ -143,14 +390,7 @@ class DivergenceAnalysis:
         depths = self.results["Depth"].values
 
         ratios = dtc_prom / dtn
-        div_dt = [ratios[0]]
-        for i in range(1, len(ratios)):
-            if ratios[i] > div_dt[-1]:
-                div_dt.append(ratios[i])
-            else:
-                div_dt.append(div_dt[-1])
-
-        self.results["Div_DT_Ratio"] = div_dt
+        self.results["Div_DT_Ratio"] = self._div_dt_ratio(ratios)
 
         # Divergence Factor
         # if depth > prf: div = div_dt else: 1
@@ -162,6 +402,9 @@ class DivergenceAnalysis:
         # dtsh = div * dtn
         self.results["DTSH"] = self.results["Div_Factor"] * self.results["DTN"]
 
+    def _div_dt_ratio(self, ratios):
+        return running_max(ratios)
+
     def _calculate_pore_pressure(self):
         # Pp uncalibrated
         # Pp = GSV - (GSV - ppn) * (DTN / DTSH) ** exp_eaton
@@ -172,6 +415,7 @@ class DivergenceAnalysis:
         pp_div = gsv - (gsv - self.ppn) * ((dtn / dtsh) ** self.exp_eaton)
         self.results["Pp_Uncal"] = pp_div
 
+    def _calculate_calibrated_pressure(self):
         # Pp calibrated
         # if depth < ms: Pp_uncal else: MW - 0.03
         self.results["Pp_Cal"] = np.where(
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from divergence_model import DivergenceAnalysis, running_max
+from trends import compute_trend, trend_extent
+
+
+class IncrementalDivergenceAnalysis(DivergenceAnalysis):
+    """
+    Append-only version of DivergenceAnalysis for while-drilling data.
+
+    Samples are fed with append(depth, dtc, mw). A row is emitted once every
+    sample its DTC trend window needs has arrived; flush() emits the rows
+    still waiting at the end of the well. Concatenating everything returned
+    by append() and flush() gives the same table as run_analysis() on the
+    whole well.
+
+    Only the trend window tail (pending rows plus the samples above them the
+    filter reads) and the running maximum of Div_DT_Ratio are kept between
+    calls. Vp, densities, overburden (closed form in depth), DTN, Pp and Pf
+    are point-wise, so each update costs O(batch + window).
+    """
+
+    def __init__(self, **params):
+        super().__init__(None, **params)
+        if self.trend_window_m is not None:
+            # The sampling step is unknown until the data arrives
+            raise ValueError(
+                "The incremental mode needs trend_window in samples "
+                "(see trends.window_samples)."
+            )
+        # Raises for filters without a finite window (exponential)
+        self._before, self._after = trend_extent(
+            self.trend_method, self.trend_window
+        )
+
+    def _load_data(self, data_file):
+        empty = np.empty(0)
+        self.depth = empty
+        self.dtc = empty
+        self.mw = empty
+        self.results = pd.DataFrame({"Depth": empty, "DTC": empty, "MW": empty})
+
+        # Samples whose trend is not final yet
+        self._pending_depth = empty
+        self._pending_dtc = empty
+        self._pending_mw = empty
+        # DTC samples above the pending rows still inside the trend window
+        self._context = empty
+        # Running maximum of DTC_Prom / DTN (None until the first row)
+        self._max_ratio = None
+        self._trend_batch = None
+        self.rows_emitted = 0
+
+    def append(self, depth, dtc, mw):
+        """
+        Adds new samples (scalars or arrays, increasing depth) and returns a
+        DataFrame with the rows that became final.
+        """
+        depth = np.atleast_1d(np.asarray(depth, dtype=float))
+        dtc = np.atleast_1d(np.asarray(dtc, dtype=float))
+        mw = np.atleast_1d(np.asarray(mw, dtype=float))
+        if not (len(depth) == len(dtc) == len(mw)):
+            raise ValueError("depth, dtc and mw must have the same length.")
+        if len(depth):
+            previous = (
+                self._pending_depth[-1:] if len(self._pending_depth) else self.depth
+            )
+            steps = np.diff(np.concatenate((previous[-1:], depth)))
+            if (steps <= 0).any():
+                raise ValueError("Depth must increase between samples.")
+
+        self._pending_depth = np.concatenate((self._pending_depth, depth))
+        self._pending_dtc = np.concatenate((self._pending_dtc, dtc))
+        self._pending_mw = np.concatenate((self._pending_mw, mw))
+
+        return self._emit(max(len(self._pending_dtc) - self._after, 0))
+
+    def flush(self):
+        """Emits the remaining rows, treating the last sample as end of well."""
+        return self._emit(len(self._pending_dtc))
+
+    def _emit(self, count):
+        if count == 0:
+            return self.results.iloc[0:0]
+
+        ctx = len(self._context)
+        dtc_window = np.concatenate((self._context, self._pending_dtc))
+        self._trend_batch = compute_trend(
+            dtc_window, self.trend_method, self.trend_window
+        )[ctx : ctx + count]
+
+        self.results = pd.DataFrame(
+            {
+                "Depth": self._pending_depth[:count],
+                "DTC": self._pending_dtc[:count],
+                "MW": self._pending_mw[:count],
+            }
+        )
+        self.run_analysis()
+
+        # Keep the last emitted depth for the monotonic check
+        self.depth = self._pending_depth[count - 1 : count]
+        self._context = (
+            dtc_window[: ctx + count][-self._before :]
+            if self._before
+            else np.empty(0)
+        )
+        self._pending_depth = self._pending_depth[count:]
+        self._pending_dtc = self._pending_dtc[count:]
+        self._pending_mw = self._pending_mw[count:]
+        self.rows_emitted += count
+        return self.results
+
+    def _dtc_trend(self, dtc, out=None):
+        if out is None:
+            return self._trend_batch
+        out[:] = self._trend_batch
+        return out
+
+    def _div_dt_ratio(self, ratios):
+        div_dt = running_max(ratios, self._max_ratio)
+        self._max_ratio = div_dt[-1]
+        return div_dt
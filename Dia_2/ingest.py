@@ -0,0 +1,173 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# How each source is joined onto the reference depths:
+#   "interpolate"  linear between the two neighbouring samples
+#   "nearest"      value of the closest sample (as-of merge)
+#   "backward"     last sample at or above the depth, e.g. MW by section
+#   "forward"      first sample at or below the depth
+JOIN_METHODS = ("interpolate", "nearest", "backward", "forward")
+
+
+def _select(df, key):
+    # Column by name, or by position when an int is given
+    if isinstance(key, int) and key not in df.columns:
+        return df.iloc[:, key]
+    return df[key]
+
+
+def read_source(path, depth=0, columns=None, sheet=0):
+    """
+    Reads one depth-indexed source and returns a DataFrame with a 'Depth'
+    column followed by the requested curves, sorted by depth without
+    missing or repeated depths.
+
+    path: Excel workbook, CSV, Parquet or LAS file (LAS needs lasio; its
+    index is used as depth). depth: depth column (name or position).
+    columns: {output name: source column} or a list of source columns;
+    None keeps every other column. sheet: Excel sheet name or position.
+    """
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext == ".las":
+        import lasio
+
+        df = lasio.read(path).df().reset_index()
+        depth = 0
+    elif ext == ".csv":
+        df = pd.read_csv(path)
+    elif ext == ".parquet":
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_excel(path, sheet_name=sheet)
+
+    depth_values = _select(df, depth)
+    if columns is None:
+        columns = {col: col for col in df.columns if col != depth_values.name}
+    elif not isinstance(columns, dict):
+        columns = {col: col for col in columns}
+
+    out = pd.DataFrame(
+        {
+            "Depth": depth_values.to_numpy(dtype=np.float64),
+            **{
+                name: _select(df, key).to_numpy(dtype=np.float64)
+                for name, key in columns.items()
+            },
+        }
+    )
+    out = out[out["Depth"].notna()].sort_values("Depth", kind="stable")
+    return out.drop_duplicates("Depth").reset_index(drop=True)
+
+
+def _interpolate(depth, source, tolerance):
+    # Linear interpolation of every curve of `source` at `depth`; each curve
+    # skips its own missing samples. Depths outside the sampled interval or
+    # farther than `tolerance` from the nearest valid sample are left
+    # missing (no extrapolation).
+    out = {}
+    for col in source.columns.drop("Depth"):
+        valid = source[col].notna().to_numpy()
+        xp = source["Depth"].to_numpy()[valid]
+        fp = source[col].to_numpy()[valid]
+        values = np.interp(depth, xp, fp, left=np.nan, right=np.nan)
+        if tolerance is not None and len(xp):
+            i = np.searchsorted(xp, depth)
+            below = depth - xp[np.maximum(i - 1, 0)]
+            above = xp[np.minimum(i, len(xp) - 1)] - depth
+            gap = np.minimum(
+                np.where(i > 0, below, np.inf),
+                np.where(i < len(xp), above, np.inf),
+            )
+            values[gap > tolerance] = np.nan
+        out[col] = values
+    return out
+
+
+def align(frames, reference=0, method="interpolate", tolerance=None):
+    """
+    Joins depth-sorted frames (see read_source) onto the depths of
+    `frames[reference]` with a sorted merge (O(n log n)).
+
+    method and tolerance (in depth units, None = unlimited) apply to every
+    frame, or can be given as lists with one entry per frame. Depths with no
+    sample within tolerance are left missing.
+    """
+    n = len(frames)
+    if not isinstance(method, (list, tuple)):
+        method = [method] * n
+    if not isinstance(tolerance, (list, tuple)):
+        tolerance = [tolerance] * n
+
+    result = frames[reference].copy()
+    depth = result["Depth"].to_numpy()
+    for i, frame in enumerate(frames):
+        if i == reference:
+            continue
+        if method[i] not in JOIN_METHODS:
+            raise ValueError(
+                f"Unknown method '{method[i]}'. Use one of {JOIN_METHODS}."
+            )
+        overlap = result.columns.intersection(frame.columns.drop("Depth"))
+        if len(overlap):
+            raise ValueError(
+                f"Column(s) {list(overlap)} come from more than one source."
+            )
+
+        if method[i] == "interpolate":
+            for col, values in _interpolate(depth, frame, tolerance[i]).items():
+                result[col] = values
+        else:
+            merged = pd.merge_asof(
+                result[["Depth"]],
+                frame,
+                on="Depth",
+                direction=method[i],
+                tolerance=None if tolerance[i] is None else float(tolerance[i]),
+            )
+            for col in frame.columns.drop("Depth"):
+                result[col] = merged[col].to_numpy()
+    return result
+
+
+def ingest(sources, reference=0, method="interpolate", tolerance=None, workers=None):
+    """
+    Loads several sources in parallel and aligns them on depth. Each source
+    is a path or a dict with the keyword arguments of read_source (path,
+    depth, columns, sheet) plus optional 'method' and 'tolerance' that
+    override the defaults for that source.
+
+    Reproducing the original script (depth from one workbook, DTC and MW
+    from another, MW every 30 m kept constant down to the next sample):
+
+        df = ingest(
+            [
+                {"path": "Pozo_L2DL.xlsx", "columns": []},
+                {"path": "Pozo_M1D.xlsx", "columns": {"DTC": 1}},
+                {"path": "Pozo_M1D.xlsx", "columns": {"MW": 2},
+                 "method": "backward", "tolerance": 30},
+            ]
+        )
+        model = DivergenceAnalysis.from_frame(df[["Depth", "DTC", "MW"]])
+
+    workers: processes used to read the sources (None = one per CPU, 1 =
+    read them in this process).
+    """
+    specs = [s if isinstance(s, dict) else {"path": s} for s in sources]
+    methods = [s.get("method", method) for s in specs]
+    tolerances = [s.get("tolerance", tolerance) for s in specs]
+    reads = [
+        {k: v for k, v in s.items() if k not in ("method", "tolerance")} for s in specs
+    ]
+
+    if workers == 1 or len(reads) == 1:
+        frames = [read_source(**r) for r in reads]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(read_source, **r) for r in reads]
+            frames = [f.result() for f in futures]
+
+    return align(frames, reference, methods, tolerances)
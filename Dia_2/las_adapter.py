@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+from divergence_model import DivergenceAnalysis
+from ingest import align
+
+
+# Sonic mnemonics tried in order when no DT curve is given
+DT_MNEMONICS = ("DTCO", "DTC", "DT", "DT4P", "DTP", "AC")
+
+# Unit spellings found in LAS headers (compared upper-case)
+FEET = {"F", "FT", "FEET", "FOOT", "FT.", "'"}
+METERS = {"M", "METER", "METERS", "METRE", "METRES", ""}
+US_PER_FT = {"US/F", "US/FT", "USEC/FT", "USEC/F", "US/FOOT", "UXFT", ""}
+US_PER_M = {"US/M", "USEC/M", "US/METER", "UXM"}
+
+# Values that mean "no data" but are sometimes left undeclared in ~W NULL
+NULL_VALUES = (-999.25, -999.0, -9999.0)
+
+
+def _curve_unit(units, mnemonic):
+    # Unit of a curve from {mnemonic: unit}, None if it is not declared
+    unit = str(units.get(mnemonic) or "").strip().upper()
+    return unit or None
+
+
+def _depth_factor(unit):
+    # Multiplier that converts depths in `unit` to meters
+    if unit is None or unit.upper() in METERS:
+        return 1.0
+    if unit.upper() in FEET:
+        return 0.3048
+    raise ValueError(f"Unknown depth unit '{unit}'. Pass depth_unit='m' or 'ft'.")
+
+
+def _dt_factor(unit):
+    # Multiplier that converts transit times in `unit` to µs/ft
+    if unit is None or unit.upper() in US_PER_FT:
+        return 1.0
+    if unit.upper() in US_PER_M:
+        return 0.3048
+    raise ValueError(f"Unknown DT unit '{unit}'. Pass dt_unit='us/ft' or 'us/m'.")
+
+
+def _without_nulls(values, nulls):
+    # Returns `values` itself unless it holds undeclared null markers
+    if nulls and np.isin(values, nulls).any():
+        values = np.where(np.isin(values, nulls), np.nan, values)
+    return values
+
+
+def las_inputs(
+    source,
+    dt=None,
+    mw=None,
+    depth_unit=None,
+    dt_unit=None,
+    mw_method="backward",
+    mw_tolerance=None,
+    nulls=NULL_VALUES,
+):
+    """
+    Builds the (depth, dtc, mw) arrays of DivergenceAnalysis from parsed LAS
+    data, without going through Excel.
+
+    source: a LASHandler (anything with get_log_data(), and optionally
+    get_curve_units() for the units) or the DataFrame it returns. Depth is the
+    frame index, or its first column when the index was reset.
+    dt: sonic mnemonic (default: first of DT_MNEMONICS present).
+    mw: mud weight in g/cm³ as a LAS mnemonic, a constant, an array with
+    one value per sample, or a DataFrame with Depth and MW columns sampled
+    anywhere (aligned with ingest.align using mw_method/mw_tolerance).
+    depth_unit/dt_unit: override the units read from the LAS header; depth
+    is converted to meters and DT to µs/ft.
+
+    The arrays are views of the LAS data whenever no conversion is needed:
+    depth is flipped if logged upwards, and the result is trimmed to the
+    interval where DT is present. Undeclared null markers (`nulls`) become
+    NaN.
+    """
+    if hasattr(source, "get_log_data"):
+        df = source.get_log_data()
+        units = source.get_curve_units() if hasattr(source, "get_curve_units") else {}
+    else:
+        units, df = {}, source
+    if df is None or df.empty:
+        raise ValueError("The LAS source has no log data.")
+
+    if isinstance(df.index, pd.RangeIndex):
+        depth_name = df.columns[0]
+        depth = df[depth_name].to_numpy(dtype=np.float64)
+    else:
+        depth_name = df.index.name
+        depth = df.index.to_numpy(dtype=np.float64)
+
+    if dt is None:
+        dt = next((m for m in DT_MNEMONICS if m in df.columns), None)
+        if dt is None:
+            raise ValueError(
+                f"No sonic curve found (tried {', '.join(DT_MNEMONICS)}). Pass dt=."
+            )
+    dtc = df[dt].to_numpy(dtype=np.float64)
+
+    if isinstance(mw, str):
+        mw = df[mw].to_numpy(dtype=np.float64)
+    elif mw is not None and np.ndim(mw) and not isinstance(mw, pd.DataFrame):
+        mw = np.asarray(mw, dtype=np.float64)
+
+    # Logged upwards: reverse (views, no copy)
+    if len(depth) > 1 and depth[0] > depth[-1]:
+        depth, dtc = depth[::-1], dtc[::-1]
+        if isinstance(mw, np.ndarray):
+            mw = mw[::-1]
+
+    dtc = _without_nulls(dtc, nulls)
+    depth = _without_nulls(depth, nulls)
+    valid = np.flatnonzero(~np.isnan(dtc) & ~np.isnan(depth))
+    if not len(valid):
+        raise ValueError(f"Curve '{dt}' has no valid samples.")
+    window = slice(valid[0], valid[-1] + 1)
+    depth, dtc = depth[window], dtc[window]
+    if np.isnan(depth).any():
+        keep = ~np.isnan(depth)
+        depth, dtc = depth[keep], dtc[keep]
+    else:
+        keep = None
+
+    factor = _depth_factor(depth_unit or _curve_unit(units, depth_name))
+    if factor != 1.0:
+        depth = depth * factor
+    factor = _dt_factor(dt_unit or _curve_unit(units, dt))
+    if factor != 1.0:
+        dtc = dtc * factor
+
+    if isinstance(mw, pd.DataFrame):
+        aligned = align(
+            [pd.DataFrame({"Depth": depth}), mw[["Depth", "MW"]]],
+            method=mw_method,
+            tolerance=mw_tolerance,
+        )
+        mw = aligned["MW"].to_numpy()
+    elif mw is None or np.ndim(mw) == 0:
+        mw = np.full(len(depth), np.nan if mw is None else float(mw))
+    else:
+        mw = _without_nulls(mw[window], nulls)
+        if keep is not None:
+            mw = mw[keep]
+
+    return depth, dtc, mw
+
+
+def from_las(source, dt=None, mw=None, **kwargs):
+    """
+    DivergenceAnalysis built from LAS data (see las_inputs). Keyword
+    arguments of las_inputs are used for the conversion, the rest are model
+    parameters:
+
+        handler = LASHandler()
+        handler.load_file("pozo.las")
+        model = from_las(handler, dt="DTCO", mw=lodos, ta=3014, rkb=30.2)
+    """
+    options = {
+        name: kwargs.pop(name)
+        for name in ("depth_unit", "dt_unit", "mw_method", "mw_tolerance", "nulls")
+        if name in kwargs
+    }
+    depth, dtc, mw_values = las_inputs(source, dt, mw, **options)
+    return DivergenceAnalysis.from_arrays(depth, dtc, mw_values, **kwargs)
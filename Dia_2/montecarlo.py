@@ -0,0 +1,210 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sweep import SWEEP_PARAMS, run_sweep
+
+
+# Curves summarized by the Monte Carlo mode (keys of the run_sweep result)
+CURVES = {"Pp_Uncal": "pp_uncal", "Pp_Cal": "pp_cal", "Pf": "pf"}
+
+# Bytes per depth sample and bin: the int32 counts of every curve plus the
+# int64 bincount of the curve being added
+_BIN_BYTES = 4 * len(CURVES) + 8
+
+
+def sample_parameters(distributions, size, rng):
+    """
+    Draws `size` parameter sets. `distributions` maps a parameter name
+    (see sweep.SWEEP_PARAMS) to one of:
+        ("normal", mean, sd)
+        ("lognormal", mean, sd)   # of the underlying normal
+        ("uniform", low, high)
+        ("triangular", low, mode, high)
+    Returns a DataFrame with one column per parameter.
+    """
+    samples = {}
+    for name, spec in distributions.items():
+        if name not in SWEEP_PARAMS:
+            raise ValueError(f"Cannot sample parameter '{name}'.")
+        kind, *args = spec
+        if kind == "normal":
+            samples[name] = rng.normal(args[0], args[1], size)
+        elif kind == "lognormal":
+            samples[name] = rng.lognormal(args[0], args[1], size)
+        elif kind == "uniform":
+            samples[name] = rng.uniform(args[0], args[1], size)
+        elif kind == "triangular":
+            samples[name] = rng.triangular(args[0], args[1], args[2], size)
+        else:
+            raise ValueError(f"Unknown distribution '{kind}' for '{name}'.")
+    return pd.DataFrame(samples)
+
+
+class _Histograms:
+    # Fixed-bin histogram per depth sample and curve. Memory is
+    # depth x bins regardless of the number of realizations.
+
+    def __init__(self, lo, hi, bins):
+        self.lo = lo
+        self.width = (hi - lo) / bins
+        self.bins = bins
+        n = len(lo)
+        # int32 is enough for up to 2**31 realizations and halves the memory
+        self.counts = np.zeros((n, bins), dtype=np.int32)
+        self.minimum = np.full(n, np.inf)
+        self.maximum = np.full(n, -np.inf)
+
+    def add(self, values):
+        # values: (depth, realizations)
+        n, bins = self.counts.shape
+        finite = np.isfinite(values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            idx = np.floor((values - self.lo[:, None]) / self.width[:, None])
+        idx = np.clip(np.nan_to_num(idx), 0, bins - 1).astype(np.int64)
+        flat = (np.arange(n)[:, None] * bins + idx)[finite]
+        self.counts += np.bincount(flat, minlength=n * bins).reshape(n, bins)
+        with np.errstate(invalid="ignore"):
+            low = np.nanmin(values, axis=1, initial=np.inf)
+            high = np.nanmax(values, axis=1, initial=-np.inf)
+        self.minimum = np.fmin(self.minimum, low)
+        self.maximum = np.fmax(self.maximum, high)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.minimum = np.fmin(self.minimum, other.minimum)
+        self.maximum = np.fmax(self.maximum, other.maximum)
+
+    def percentile(self, q):
+        # Linear interpolation inside the bin where the cumulative count
+        # reaches q% of the samples at each depth.
+        cum = np.cumsum(self.counts, axis=1)
+        total = cum[:, -1]
+        target = q / 100.0 * total
+        b = np.argmax(cum >= target[:, None], axis=1)
+        rows = np.arange(len(b))
+        before = np.where(b > 0, cum[rows, np.maximum(b - 1, 0)], 0)
+        in_bin = self.counts[rows, b]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.where(in_bin > 0, (target - before) / in_bin, 0.5)
+        value = self.lo + (b + frac) * self.width
+        value = np.clip(value, self.minimum, self.maximum)
+        value[total == 0] = np.nan
+        return value
+
+
+def _curve_histograms(model, params, ranges, bins, stride, sweep_bytes):
+    # Evaluates one chunk of realizations and bins every curve.
+    result = run_sweep(model, params, max_bytes=sweep_bytes)
+    histograms = {}
+    for name, key in CURVES.items():
+        lo, hi = ranges[name]
+        hist = _Histograms(lo, hi, bins)
+        hist.add(result[key][::stride])
+        histograms[name] = hist
+    return histograms
+
+
+def _chunk_task(model, distributions, size, seed, ranges, bins, stride, sweep_bytes):
+    rng = np.random.default_rng(seed)
+    params = sample_parameters(distributions, size, rng)
+    return _curve_histograms(model, params, ranges, bins, stride, sweep_bytes)
+
+
+def run_monte_carlo(
+    model,
+    distributions,
+    realizations=1000,
+    chunk_size=200,
+    percentiles=(10, 50, 90),
+    bins=256,
+    stride=None,
+    workers=None,
+    seed=None,
+    max_bytes=512 * 2**20,
+):
+    """
+    Monte Carlo uncertainty for Pp_Uncal, Pp_Cal and Pf of a
+    DivergenceAnalysis. Parameters not listed in `distributions` keep the
+    model's values.
+
+    Realizations are evaluated in chunks of `chunk_size` with the broadcasted
+    sweep engine. Each chunk is reduced to a fixed-bin histogram per depth,
+    so memory depends on depth x bins, not on the number of realizations.
+    The bin range of each depth is set by the first chunk (widened by its
+    spread); values outside it fall into the edge bins and the exact
+    minimum/maximum are tracked to clip the estimate. `stride` keeps one of
+    every `stride` depth samples; by default it is the smallest stride
+    whose histograms fit in `max_bytes`. chunk_size is also lowered so
+    that evaluating one chunk (its curves plus the sweep temporaries) fits
+    in `max_bytes`, so the peak memory stays within a few times
+    `max_bytes` (~700 MB for max_bytes=256 MB on a 1M-sample well). Only
+    very long wells are affected.
+
+    workers=None evaluates the chunks in this process; an integer (or 0 for
+    one per CPU) spreads them over a process pool.
+
+    Returns a DataFrame with Depth and one column per curve and percentile
+    (e.g. 'Pf_P10').
+    """
+    n = len(model.depth)
+    if stride is None:
+        stride = max(1, -(-n * bins * _BIN_BYTES // max_bytes))
+    # Half of the budget for the (n, chunk) float64 curves the sweep keeps,
+    # half for its temporaries
+    sweep_bytes = max_bytes // 2
+    chunk_size = max(
+        1, min(chunk_size, sweep_bytes // (len(CURVES) * 8 * max(n, 1)))
+    )
+
+    seeds = np.random.SeedSequence(seed).spawn(-(-realizations // chunk_size))
+    sizes = [chunk_size] * (len(seeds) - 1)
+    sizes.append(realizations - chunk_size * (len(seeds) - 1))
+
+    # First chunk in this process: it defines the histogram ranges
+    rng = np.random.default_rng(seeds[0])
+    pilot = run_sweep(
+        model,
+        sample_parameters(distributions, sizes[0], rng),
+        max_bytes=sweep_bytes,
+    )
+    ranges = {}
+    for name, key in CURVES.items():
+        values = pilot[key][::stride]
+        with np.errstate(invalid="ignore"):
+            lo = np.nanmin(values, axis=1, initial=np.inf)
+            hi = np.nanmax(values, axis=1, initial=-np.inf)
+        lo = np.where(np.isfinite(lo), lo, 0.0)
+        hi = np.where(np.isfinite(hi), hi, 0.0)
+        spread = np.maximum(hi - lo, 1e-6)
+        ranges[name] = (lo - spread, hi + spread)
+
+    totals = {}
+    for name, key in CURVES.items():
+        totals[name] = _Histograms(*ranges[name], bins)
+        totals[name].add(pilot[key][::stride])
+    del pilot
+
+    tasks = [
+        (model, distributions, size, s, ranges, bins, stride, sweep_bytes)
+        for size, s in zip(sizes[1:], seeds[1:])
+    ]
+    if workers is None:
+        for task in tasks:
+            partial = _chunk_task(*task)
+            for name in CURVES:
+                totals[name].merge(partial[name])
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            # map() releases each partial result as soon as it is consumed
+            for partial in pool.map(_chunk_task, *zip(*tasks)):
+                for name in CURVES:
+                    totals[name].merge(partial[name])
+
+    bands = {"Depth": np.asarray(model.depth, dtype=float)[::stride]}
+    for name in CURVES:
+        for q in percentiles:
+            bands[f"{name}_P{q:g}"] = totals[name].percentile(q)
+    return pd.DataFrame(bands)
@@ -0,0 +1,56 @@
+import numpy as np
+import plotly.graph_objects as go
+
+
+def minmax_indices(values, buckets):
+    """
+    Indices of the minimum and maximum of `values` in each of `buckets`
+    equal-size consecutive buckets (missing values are ignored), plus the
+    first and last sample. Keeps the peaks of a log that plain decimation
+    would drop.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(buckets, size)
+
+    missing = np.isnan(blocks)
+    low = np.argmin(np.where(missing, np.inf, blocks), axis=1)
+    high = np.argmax(np.where(missing, -np.inf, blocks), axis=1)
+
+    offsets = np.arange(buckets) * size
+    idx = np.concatenate(([0, n - 1], offsets + low, offsets + high))
+    return np.unique(idx[idx < n])
+
+
+def downsample_frame(df, columns, max_points=4000):
+    """
+    Returns the rows of `df` needed to draw `columns` against depth with at
+    most about `max_points` rows in total, the budget being split across
+    the columns. The same rows are used for every column so traces stay
+    aligned, which only matters for fill="tonextx" between two curves (e.g.
+    the divergent area between DTN and DTSH); downsample independent curves
+    on their own (see depth_trace) so each gets the whole budget.
+    """
+    n = len(df)
+    columns = list(columns)
+    if max_points is None or n <= max_points:
+        return df
+    # Two rows (min, max) per bucket and column, plus the first and last row
+    buckets = max((max_points - 2) // (2 * len(columns)), 1)
+    idx = np.unique(
+        np.concatenate([minmax_indices(df[col].values, buckets) for col in columns])
+    )
+    return df.iloc[idx]
+
+
+def depth_trace(df, column, max_points=None, **kwargs):
+    """
+    WebGL line trace of `column` against Depth. With `max_points` the curve
+    is first reduced on its own with downsample_frame.
+    """
+    if max_points is not None:
+        df = downsample_frame(df, [column], max_points)
+    return go.Scattergl(x=df[column], y=df["Depth"], mode="lines", **kwargs)
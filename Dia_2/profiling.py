@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+def frame_bytes(df):
+    """Bytes held by the columns of a DataFrame (index excluded)."""
+    return int(df.memory_usage(index=False, deep=False).sum())
+
+
+def stage_bytes(model, stage):
+    """
+    Bytes of the results columns written by `stage` (its STAGE_GRAPH
+    outputs). A stage outside the graph (the fused run) writes the whole
+    results frame.
+    """
+    graph = getattr(model, "STAGE_GRAPH", {})
+    if stage not in graph:
+        return frame_bytes(model.results)
+    outputs = [col for col in graph[stage][2] if col in model.results.columns]
+    return frame_bytes(model.results[outputs])
+
+
+def run_stage(model, stage, func, callbacks, origin):
+    """
+    Calls func() (one pipeline stage of `model`) and reports it to every
+    callback as a dict with: stage, start and seconds (perf_counter seconds
+    relative to `origin`), allocated_bytes (bytes of the columns the stage
+    wrote, see stage_bytes), peak_bytes (peak traced memory above the
+    start of the stage, only when tracemalloc is tracing, else None) and
+    rows.
+    """
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    record = {
+        "stage": stage,
+        "start": start - origin,
+        "seconds": elapsed,
+        "allocated_bytes": stage_bytes(model, stage),
+        "peak_bytes": (
+            tracemalloc.get_traced_memory()[1] - traced_before if tracing else None
+        ),
+        "rows": len(model.results),
+    }
+    for callback in callbacks:
+        callback(record)
+
+
+class StageProfiler:
+    """
+    Callback that collects the stage records of run_analysis and exports
+    them as a table, JSON or Chrome trace events (chrome://tracing,
+    Perfetto).
+
+        profiler = StageProfiler()
+        model.run_analysis(callbacks=[profiler])
+        profiler.to_frame()
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(dict(record))
+
+    def clear(self):
+        self.records = []
+
+    def to_frame(self):
+        return pd.DataFrame(
+            self.records,
+            columns=[
+                "stage",
+                "start",
+                "seconds",
+                "allocated_bytes",
+                "peak_bytes",
+                "rows",
+            ],
+        )
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.records, **kwargs)
+
+    def to_chrome_trace(self, name="DivergenceAnalysis"):
+        """Returns a Chrome trace document ("X" complete events, µs)."""
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = [
+            {
+                "name": record["stage"],
+                "cat": name,
+                "ph": "X",
+                "ts": record["start"] * 1e6,
+                "dur": record["seconds"] * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": {
+                    "allocated_bytes": record["allocated_bytes"],
+                    "peak_bytes": record["peak_bytes"],
+                    "rows": record["rows"],
+                },
+            }
+            for record in self.records
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
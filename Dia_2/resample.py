@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+
+# Ways of putting an irregular series on the regular grid:
+#   "linear"   linear interpolation between the neighbouring samples
+#   "nearest"  value of the closest valid sample
+#   "average"  mean of the samples within half a step of each grid depth
+RESAMPLE_METHODS = ("linear", "nearest", "average")
+
+
+def regular_grid(start, stop, step):
+    """Depths start, start + step, ... up to stop (inclusive)."""
+    if step <= 0:
+        raise ValueError("The resampling step must be positive.")
+    # Small tolerance so stop is kept despite rounding of (stop - start) / step
+    n = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return start + step * np.arange(max(n, 0), dtype=np.float64)
+
+
+def _nearest(depth, values, grid):
+    # Closest valid sample; NaN outside the valid samples, like "linear"
+    valid = ~np.isnan(values)
+    depth, values = depth[valid], values[valid]
+    out = np.full(len(grid), np.nan)
+    if not len(depth):
+        return out
+    inside = (grid >= depth[0]) & (grid <= depth[-1])
+    if len(depth) == 1:
+        out[inside] = values[0]
+        return out
+    g = grid[inside]
+    i = np.clip(np.searchsorted(depth, g), 1, len(depth) - 1)
+    i -= g - depth[i - 1] <= depth[i] - g
+    out[inside] = values[i]
+    return out
+
+
+def _average(depth, values, grid, step):
+    # Each sample goes to the grid point within half a step (one pass of
+    # bincount, O(n)); missing samples are skipped, empty cells are NaN
+    cell = np.floor((depth - grid[0]) / step + 0.5).astype(np.int64)
+    inside = (cell >= 0) & (cell < len(grid)) & ~np.isnan(values)
+    cell = cell[inside]
+    total = np.bincount(cell, weights=values[inside], minlength=len(grid))
+    count = np.bincount(cell, minlength=len(grid))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def resample(depth, columns, step, method="linear", start=None, stop=None):
+    """
+    Puts depth-sorted series on a regular grid every `step` meters (from
+    `start` to `stop`, by default the first and last depth).
+
+    columns: {name: array} with one value per depth. Missing values are
+    skipped by every method, and grid depths beyond the valid samples are
+    NaN. Returns a DataFrame with the grid as 'Depth' and one column per
+    series.
+    """
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(
+            f"Unknown resampling method '{method}'. Use one of {RESAMPLE_METHODS}."
+        )
+    depth = np.asarray(depth, dtype=np.float64)
+    if np.any(np.diff(depth) <= 0):
+        raise ValueError("Depth must be strictly increasing to resample.")
+
+    grid = regular_grid(
+        depth[0] if start is None else start,
+        depth[-1] if stop is None else stop,
+        step,
+    )
+    out = {"Depth": grid}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        if method == "average":
+            out[name] = _average(depth, values, grid, step)
+        elif method == "nearest":
+            out[name] = _nearest(depth, values, grid)
+        else:
+            valid = ~np.isnan(values)
+            out[name] = np.interp(
+                grid, depth[valid], values[valid], left=np.nan, right=np.nan
+            )
+    return pd.DataFrame(out)
+
+
+def resample_frame(df, step, method="linear", depth_column="Depth", **kwargs):
+    """resample() for a DataFrame: every other column is resampled."""
+    columns = {col: df[col].to_numpy() for col in df.columns if col != depth_column}
+    out = resample(df[depth_column].to_numpy(), columns, step, method, **kwargs)
+    return out.rename(columns={"Depth": depth_column})
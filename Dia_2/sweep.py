@@ -0,0 +1,119 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from divergence_model import running_max
+
+
+# Model parameters that can be swept. The rest (rkb, ta, prf, ms and the
+# trend filter) are taken from the model passed to run_sweep.
+SWEEP_PARAMS = ("po", "k", "c", "dtco", "c1", "ppn", "exp_eaton")
+
+
+def parameter_grid(**values):
+    """
+    Builds the cartesian product of the given parameter values.
+    Example: parameter_grid(c1=np.linspace(-6e-4, -2e-4, 41), ppn=[1.03, 1.05])
+    Returns a DataFrame with one row per parameter set.
+    """
+    unknown = set(values) - set(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"Cannot sweep parameters: {', '.join(sorted(unknown))}")
+    names = list(values)
+    combos = itertools.product(*(np.atleast_1d(values[n]) for n in names))
+    return pd.DataFrame(list(combos), columns=names, dtype=float)
+
+
+def _sweep_chunk(model, depth, dtc_prom, mw, params):
+    # Same formulas as DivergenceAnalysis.run_analysis, broadcast over
+    # depth (rows) x parameter sets (columns).
+    d = depth[:, None]
+    z = model.z
+
+    sv = 0.145 * (
+        params["po"] * 9.81 * d
+        + params["k"] * 9.81 * (d ** (params["c"] + 1)) / (params["c"] + 1)
+    )
+    gsv = sv / (d * 1.422)
+
+    dtn = params["dtco"] * np.exp(params["c1"] * (d - z))
+    div_dt = running_max(dtc_prom[:, None] / dtn)
+    dtsh = np.where(d > model.prf, div_dt, 1.0) * dtn
+
+    pp_uncal = gsv - (gsv - params["ppn"]) * ((dtn / dtsh) ** params["exp_eaton"])
+    pp_cal = np.where(d < model.ms, pp_uncal, mw[:, None] - 0.03)
+
+    v = 0.0645 * np.log(d) - 0.067
+    pf = pp_uncal + (v / (1 - v)) * (gsv - pp_uncal)
+
+    # Misfit: RMS between Pp_Uncal and the MW calibration (MW - 0.03) over the
+    # calibrated interval (depth >= ms).
+    residual = pp_uncal - (mw[:, None] - 0.03)
+    residual[depth < model.ms] = np.nan
+    with np.errstate(invalid="ignore"):
+        misfit = np.sqrt(np.nanmean(residual**2, axis=0))
+
+    return pp_uncal, pp_cal, pf, misfit
+
+
+def run_sweep(model, grid, max_bytes=256 * 2**20, keep_curves=True):
+    """
+    Evaluates the divergence pipeline for every parameter set in `grid`
+    (a DataFrame from parameter_grid, or a dict of equal-length arrays)
+    using the data already loaded in `model` (a DivergenceAnalysis).
+
+    Parameter sets are processed in chunks so that the depth x chunk
+    temporaries stay around `max_bytes`. Returns a dict with:
+      params   -> DataFrame of parameter sets (with a 'misfit' column)
+      depth    -> depth array (n,)
+      pp_uncal, pp_cal, pf -> arrays (n, m), only if keep_curves is True
+      misfit   -> array (m,)
+    """
+    grid = pd.DataFrame(grid).reset_index(drop=True)
+    unknown = set(grid.columns) - set(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"Cannot sweep parameters: {', '.join(sorted(unknown))}")
+
+    depth = np.asarray(model.depth, dtype=float)
+    mw = np.asarray(model.mw, dtype=float)
+    # The DTC trend does not depend on the swept parameters: compute it once
+    dtc_prom = model._dtc_trend(np.asarray(model.dtc, dtype=float))
+
+    n, m = len(depth), len(grid)
+    # About a dozen (n, chunk) float64 temporaries are alive at once
+    chunk = max(1, int(max_bytes // (12 * 8 * max(n, 1))))
+
+    fixed = {name: float(getattr(model, name)) for name in SWEEP_PARAMS}
+    values = {
+        name: grid[name].to_numpy(dtype=float) if name in grid else None
+        for name in SWEEP_PARAMS
+    }
+
+    misfit = np.empty(m)
+    if keep_curves:
+        pp_uncal = np.empty((n, m))
+        pp_cal = np.empty((n, m))
+        pf = np.empty((n, m))
+
+    for start in range(0, m, chunk):
+        stop = min(start + chunk, m)
+        params = {
+            name: (values[name][start:stop] if values[name] is not None else fixed[name])
+            for name in SWEEP_PARAMS
+        }
+        out = _sweep_chunk(model, depth, dtc_prom, mw, params)
+        if keep_curves:
+            pp_uncal[:, start:stop] = out[0]
+            pp_cal[:, start:stop] = out[1]
+            pf[:, start:stop] = out[2]
+        misfit[start:stop] = out[3]
+
+    result = {
+        "params": grid.assign(misfit=misfit),
+        "depth": depth,
+        "misfit": misfit,
+    }
+    if keep_curves:
+        result.update(pp_uncal=pp_uncal, pp_cal=pp_cal, pf=pf)
+    return result
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_well(
+    n,
+    step=0.15,
+    z=3044.2,
+    dtco=180.0,
+    dtma=55.0,
+    c1=-0.0004,
+    overpressure_top=0.6,
+    overpressure_gain=25.0,
+    noise=3.0,
+    seed=0,
+):
+    """
+    Generates a synthetic well with `n` samples every `step` meters starting
+    just below the mudline depth `z`, in the Depth/DTC/MW layout of the
+    Pozo_*.xlsx workbooks.
+
+    DTC follows an Athy compaction trend towards the matrix transit time
+    `dtma`, plus Gaussian noise. Below `overpressure_top` (fraction of the
+    well) the transit time ramps up by up to `overpressure_gain` µs/ft, as
+    in an undercompacted interval. MW steps up at casing points and follows
+    the overpressure with a 0.05 g/cm³ margin.
+    """
+    rng = np.random.default_rng(seed)
+    depth = z + step * (1 + np.arange(n, dtype=np.float64))
+
+    normal = dtma + (dtco - dtma) * np.exp(c1 * (depth - z))
+    position = np.arange(n) / max(n - 1, 1)
+    ramp = np.clip((position - overpressure_top) / (1 - overpressure_top), 0, 1)
+    dtc = normal + overpressure_gain * ramp + rng.normal(0.0, noise, n)
+
+    # Four casing sections; MW rises with the overpressure ramp
+    section = np.minimum((position * 4).astype(int), 3)
+    mw = 1.03 + 0.04 * section + 0.05 + 0.4 * ramp
+    mw = np.round(mw, 2)
+
+    return pd.DataFrame({"Depth": depth, "DTC": dtc, "MW": mw})
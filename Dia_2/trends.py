@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Window filters used to build the DTC trend (DTC_Prom).
+# Every filter takes the DTC array and a window size in samples and returns
+# an array of the same length.
+
+
+def forward_mean(values, window=101, out=None):
+    """
+    Forward-looking mean: out[i] = mean(values[i:i + window]).
+    Matches the original loop bit-for-bit (the window shrinks at the bottom
+    of the well), but runs the reduction in NumPy instead of Python.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if out is None:
+        out = np.empty(n)
+    full = max(n - window + 1, 0)
+    if full:
+        # Each row of the sliding view is contiguous, so NumPy reduces it with
+        # the same pairwise summation that np.mean(values[i:end]) uses.
+        sliding_window_view(values, window).mean(axis=1, out=out[:full])
+    # Last window - 1 samples: the window is truncated at the end of the data
+    for i in range(full, n):
+        out[i] = np.mean(values[i:])
+    return out
+
+
+def _windowed_mean(values, before, after):
+    # Mean over values[i - before : i + after + 1] using cumulative sums.
+    # Missing samples are skipped and the window is truncated at the edges.
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    valid = np.isfinite(values)
+    # Remove the offset so the cumulative sums stay small on long wells
+    offset = np.mean(values[valid]) if valid.any() else 0.0
+    centered = np.where(valid, values - offset, 0.0)
+
+    csum = np.concatenate(([0.0], np.cumsum(centered)))
+    ccount = np.concatenate(([0], np.cumsum(valid)))
+
+    idx = np.arange(n)
+    lo = np.clip(idx - before, 0, n)
+    hi = np.clip(idx + after + 1, 0, n)
+    count = ccount[hi] - ccount[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = (csum[hi] - csum[lo]) / count + offset
+    out[count == 0] = np.nan
+    return out
+
+
+def centered_mean(values, window=101):
+    """Centered moving average over `window` samples."""
+    # Same alignment as pandas' centered rolling windows (and rolling_median)
+    return _windowed_mean(values, window // 2, (window - 1) // 2)
+
+
+def trailing_mean(values, window=101):
+    """Trailing moving average: mean of the current and previous samples."""
+    return _windowed_mean(values, window - 1, 0)
+
+
+def exponential_mean(values, window=101):
+    """Exponentially weighted moving average with span = `window`."""
+    series = pd.Series(np.asarray(values, dtype=float))
+    return series.ewm(span=window, adjust=False, ignore_na=True).mean().to_numpy()
+
+
+def rolling_median(values, window=101):
+    """Centered rolling median over `window` samples."""
+    series = pd.Series(np.asarray(values, dtype=float))
+    return (
+        series.rolling(window, center=True, min_periods=1).median().to_numpy()
+    )
+
+
+TREND_FILTERS = {
+    "forward": forward_mean,
+    "centered": centered_mean,
+    "trailing": trailing_mean,
+    "exponential": exponential_mean,
+    "median": rolling_median,
+}
+
+
+def trend_extent(method, window=101):
+    """
+    Returns (before, after): how many samples above and below a point the
+    filter reads. Used by the incremental mode to know which rows are final.
+    The exponential filter depends on the whole history and has no extent.
+    """
+    window = int(window)
+    extents = {
+        "forward": (0, window - 1),
+        "centered": (window // 2, (window - 1) // 2),
+        "trailing": (window - 1, 0),
+        "median": (window // 2, (window - 1) // 2),
+    }
+    if method not in extents:
+        raise ValueError(f"Trend method '{method}' has no finite window extent.")
+    return extents[method]
+
+
+def window_samples(depth, window_m):
+    """
+    Number of samples spanning `window_m` meters of `depth`, using the mean
+    sampling step: a window of N samples covers (N - 1) steps, so 100 m on
+    a 1 m log gives the original 101 samples. On irregular logs the
+    physical length is only exact after resampling (see resample.py).
+    """
+    depth = np.asarray(depth)
+    if len(depth) < 2 or depth[-1] == depth[0]:
+        return 1
+    step = abs(float(depth[-1]) - float(depth[0])) / (len(depth) - 1)
+    return max(int(round(window_m / step)) + 1, 1)
+
+
+def compute_trend(values, method="forward", window=101, out=None):
+    """
+    Applies the selected trend filter to `values`.
+    `method` is one of the keys of TREND_FILTERS. If `out` is given the
+    trend is written into it.
+    """
+    if method not in TREND_FILTERS:
+        raise ValueError(
+            f"Unknown trend method '{method}'. "
+            f"Available: {', '.join(TREND_FILTERS)}"
+        )
+    window = int(window)
+    if window < 1:
+        raise ValueError("Trend window must be at least 1 sample.")
+    if method == "forward":
+        return forward_mean(values, window, out=out)
+    if out is None:
+        return TREND_FILTERS[method](values, window)
+    out[:] = TREND_FILTERS[method](values, window)
+    return out
@@ -0,0 +1,197 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from batch import find_wells
+
+
+# Columns stored in the on-disk cache, in the order DivergenceAnalysis expects
+WELL_COLUMNS = ("Depth", "DTC", "MW")
+
+# Parsed workbooks kept in memory, keyed by the SHA-256 of the file content.
+# Parsing with openpyxl is by far the slowest step of the analysis, so a
+# parameter change should never trigger it again.
+MAX_CACHED_WELLS = 16
+_well_cache = OrderedDict()
+
+
+def read_bytes(source):
+    """Returns the raw content of a path, bytes or file-like object."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        with open(source, "rb") as f:
+            return f.read()
+    # File-like object (e.g. Streamlit UploadedFile)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source.read()
+
+
+def file_digest(source):
+    """SHA-256 hex digest of the file content."""
+    return hashlib.sha256(read_bytes(source)).hexdigest()
+
+
+def read_well(source, digest=None):
+    """
+    Parses a well workbook and returns its first sheet as a DataFrame.
+    Results are cached by content digest; pass `digest` if it is already
+    known to avoid hashing the file again. The returned DataFrame is shared
+    between callers and must not be modified in place.
+    """
+    data = None
+    if digest is None:
+        data = read_bytes(source)
+        digest = hashlib.sha256(data).hexdigest()
+
+    if digest in _well_cache:
+        _well_cache.move_to_end(digest)
+        return _well_cache[digest]
+
+    if data is None:
+        data = read_bytes(source)
+    df = pd.read_excel(io.BytesIO(data))
+
+    _well_cache[digest] = df
+    while len(_well_cache) > MAX_CACHED_WELLS:
+        _well_cache.popitem(last=False)
+    return df
+
+
+def clear_cache():
+    """Drops every parsed well from the cache."""
+    _well_cache.clear()
+
+
+def cache_dir():
+    """
+    Directory of the on-disk well cache. Can be changed with the
+    DIVERGENCE_CACHE_DIR environment variable.
+    """
+    return os.environ.get(
+        "DIVERGENCE_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "divergencia"),
+    )
+
+
+def store_columns(digest, df, directory=None):
+    """
+    Saves Depth/DTC/MW of a parsed well as one .npy file per column in
+    <cache>/<digest>/. The folder is written to a temporary location first
+    and renamed, so readers never see a half-written entry.
+    """
+    directory = directory or cache_dir()
+    target = os.path.join(directory, digest)
+    if os.path.isdir(target):
+        return target
+
+    os.makedirs(directory, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{digest[:12]}-", dir=directory)
+    try:
+        for i, name in enumerate(WELL_COLUMNS):
+            values = np.ascontiguousarray(df.iloc[:, i], dtype=np.float64)
+            np.save(os.path.join(tmp, f"{name}.npy"), values)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            meta = {
+                "source_columns": [str(col) for col in df.columns[:3]],
+                "rows": len(df),
+            }
+            json.dump(meta, f)
+        os.rename(tmp, target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        # Another process may have stored the same well meanwhile
+        if not os.path.isdir(target):
+            raise
+    return target
+
+
+def load_columns(digest, directory=None):
+    """
+    Maps the cached columns of a well without copying them.
+    Returns a dict {column: read-only array backed by the file} or None if
+    the well is not cached.
+    """
+    target = os.path.join(directory or cache_dir(), digest)
+    if not os.path.isdir(target):
+        return None
+    # np.asarray turns the memmap into a plain ndarray view of the same pages
+    return {
+        name: np.asarray(np.load(os.path.join(target, f"{name}.npy"), mmap_mode="r"))
+        for name in WELL_COLUMNS
+    }
+
+
+def read_well_columns(source, digest=None, directory=None):
+    """
+    Returns (depth, dtc, mw) for a well workbook. The first time a workbook
+    is seen it is parsed and stored in the columnar cache; later calls only
+    hash the file and memory-map the stored arrays.
+    """
+    if digest is None:
+        digest = file_digest(source)
+
+    columns = load_columns(digest, directory)
+    if columns is None:
+        df = read_well(source, digest=digest)
+        try:
+            store_columns(digest, df, directory)
+            columns = load_columns(digest, directory)
+        except OSError:
+            # Read-only or full disk: keep working from memory
+            columns = {
+                name: np.asarray(df.iloc[:, i], dtype=np.float64)
+                for i, name in enumerate(WELL_COLUMNS)
+            }
+    return tuple(columns[name] for name in WELL_COLUMNS)
+
+
+def warm_cache(source, directory=None):
+    """
+    Converts every workbook in a directory (or glob pattern) into the
+    columnar cache. Returns {path: digest or error message}.
+    """
+    report = {}
+    for path in find_wells(source):
+        try:
+            digest = file_digest(path)
+            if load_columns(digest, directory) is None:
+                store_columns(digest, read_well(path, digest=digest), directory)
+            report[path] = digest
+        except Exception as e:
+            report[path] = f"ERROR {type(e).__name__}: {e}"
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Caché columnar de pozos.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    warm = subparsers.add_parser(
+        "warm", help="Convierte todos los pozos de un directorio a la caché"
+    )
+    warm.add_argument("source", help="Directorio o patrón glob de archivos .xlsx")
+    warm.add_argument("--cache-dir", default=None, help="Directorio de la caché")
+    args = parser.parse_args(argv)
+
+    report = warm_cache(args.source, args.cache_dir)
+    failed = 0
+    for path, status in report.items():
+        print(f"{status}  {path}")
+        failed += status.startswith("ERROR")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import lasio
+import pandas as pd
+
+from las_loader import decode_las_text
+
+
+INDEX_NAME = ".las_catalog.json"
+# Bump when the fields stored per file change
+INDEX_VERSION = 1
+
+# Depth units converted to meters for the coverage queries
+_FEET = {"F", "FT", "FEET", "FOOT"}
+
+# Mnemonics accepted for common curve families in queries
+CURVE_ALIASES = {
+    "DT": ("DT", "DTC", "DTCO", "DT4P", "DTP", "AC"),
+    "RHOB": ("RHOB", "RHOZ", "DEN", "ZDEN"),
+    "GR": ("GR", "GRC", "SGR", "CGR", "GR_EDTC"),
+    "NPHI": ("NPHI", "TNPH", "NPOR"),
+}
+
+# Well (~W) items kept in the catalog besides STRT/STOP/STEP/NULL
+WELL_FIELDS = ("WELL", "UWI", "FLD", "LOC", "COMP", "CTRY", "LATI", "LONG", "X", "Y")
+
+
+def read_header_text(path):
+    """Returns the text of a LAS file up to (not including) the ~A section."""
+    lines = []
+    with open(path, "rb") as f:
+        for line in f:
+            if line.lstrip()[:2].upper() == b"~A":
+                break
+            lines.append(line)
+    return decode_las_text(b"".join(lines))
+
+
+def _value(section, mnemonic):
+    return section[mnemonic].value if mnemonic in section else None
+
+
+def read_header(path):
+    """
+    Parses only the ~V/~W/~C (and ~P) sections of a LAS file and returns a
+    catalog entry: well fields, STRT/STOP/STEP with their unit, the depth
+    range in meters and the curves with their units.
+    """
+    las = lasio.read(io.StringIO(read_header_text(path)), ignore_data=True)
+    unit = str(las.well["STRT"].unit).strip().upper() if "STRT" in las.well else ""
+    factor = 0.3048 if unit in _FEET else 1.0
+
+    entry = {field.lower(): _value(las.well, field) for field in WELL_FIELDS}
+    for field in ("STRT", "STOP", "STEP", "NULL"):
+        value = _value(las.well, field)
+        try:
+            entry[field.lower()] = float(value)
+        except (TypeError, ValueError):
+            entry[field.lower()] = None
+    entry["depth_unit"] = unit
+    if entry["strt"] is not None and entry["stop"] is not None:
+        entry["top_m"] = min(entry["strt"], entry["stop"]) * factor
+        entry["base_m"] = max(entry["strt"], entry["stop"]) * factor
+    else:
+        entry["top_m"] = entry["base_m"] = None
+    entry["version"] = _value(las.version, "VERS")
+    entry["curves"] = [curve.mnemonic for curve in las.curves]
+    entry["units"] = {curve.mnemonic: curve.unit for curve in las.curves}
+    # lasio returns numpy/str values; keep the index JSON-serializable
+    return json.loads(json.dumps(entry, default=str))
+
+
+def find_las_files(directory):
+    """Every .las file under `directory` (recursively), sorted."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(
+            os.path.join(root, f) for f in files if f.upper().endswith(".LAS")
+        )
+    return sorted(paths)
+
+
+class LASCatalog:
+    """
+    Header-only catalog of the LAS files under a directory tree.
+
+    The index is stored as JSON in `index_path` (by default
+    <directory>/.las_catalog.json). refresh() only re-reads files whose
+    modification time or size changed, so rescanning a large archive costs
+    one stat() per unchanged file. Files whose header cannot be parsed are
+    recorded too, and are retried only once they change.
+
+        catalog = LASCatalog("pozos/").refresh()
+        catalog.query(curves=["DT", "GR"], top=3000, base=4000)
+    """
+
+    def __init__(self, directory, index_path=None):
+        self.directory = os.path.abspath(directory)
+        self.index_path = index_path or os.path.join(self.directory, INDEX_NAME)
+        self.entries = {}
+        # Unparseable files: {path: {"error", "mtime_ns", "size"}}
+        self._failed = {}
+        self._frame = None
+        self._load()
+        self.errors = {key: item["error"] for key, item in self._failed.items()}
+
+    def _load(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("version") == INDEX_VERSION:
+            self.entries = index["files"]
+            self._failed = index.get("errors", {})
+
+    def save(self):
+        """Writes the index atomically (temporary file + rename)."""
+        directory = os.path.dirname(self.index_path) or "."
+        fd, tmp = tempfile.mkstemp(prefix=".las_catalog-", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                index = {
+                    "version": INDEX_VERSION,
+                    "files": self.entries,
+                    "errors": self._failed,
+                }
+                json.dump(index, f)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def refresh(self, workers=8, save=True):
+        """
+        Brings the index up to date with the directory: new or modified files
+        (by mtime and size) have their header read, removed files are
+        dropped. Files whose header cannot be parsed are listed in
+        self.errors and are not read again until they change.
+        """
+        current = {}
+        failed = {}
+        stale = []
+        for path in find_las_files(self.directory):
+            key = os.path.relpath(path, self.directory)
+            st = os.stat(path)
+            for known, target in ((self.entries, current), (self._failed, failed)):
+                entry = known.get(key)
+                if entry is not None and (
+                    entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size
+                ):
+                    target[key] = entry
+                    break
+            else:
+                stale.append((key, path, st))
+
+        def read(item):
+            key, path, st = item
+            try:
+                entry = read_header(path)
+            except Exception as e:
+                entry = {"error": f"{type(e).__name__}: {e}"}
+                error = True
+            else:
+                error = False
+            entry.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+            return key, entry, error
+
+        # Header reads are small and I/O bound, so threads are enough
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for key, entry, error in pool.map(read, stale):
+                (failed if error else current)[key] = entry
+
+        changed = (
+            bool(stale)
+            or len(current) != len(self.entries)
+            or len(failed) != len(self._failed)
+        )
+        self.entries = current
+        self._failed = failed
+        self.errors = {key: item["error"] for key, item in failed.items()}
+        self._frame = None
+        if save and changed:
+            self.save()
+        return self
+
+    def to_frame(self):
+        """One row per LAS file (path relative to the catalog directory)."""
+        if self._frame is None:
+            rows = [{"path": key, **entry} for key, entry in self.entries.items()]
+            self._frame = pd.DataFrame(rows)
+        return self._frame
+
+    def query(self, curves=None, top=None, base=None, well=None):
+        """
+        Files that have every curve in `curves` and cover the depth interval
+        top-base (meters). A curve name listed in CURVE_ALIASES matches any
+        of its aliases (e.g. "DT" matches DTCO); a tuple gives the accepted
+        mnemonics explicitly. `well` filters by a substring of the well name
+        (case-insensitive).
+        """
+        df = self.to_frame()
+        if df.empty:
+            return df
+        mask = pd.Series(True, index=df.index)
+        for curve in curves or ():
+            if not isinstance(curve, tuple):
+                curve = CURVE_ALIASES.get(curve, (curve,))
+            accepted = {name.upper() for name in curve}
+            mask &= df["curves"].map(
+                lambda names: any(name.upper() in accepted for name in names)
+            )
+        if top is not None:
+            mask &= df["top_m"].le(top)
+        if base is not None:
+            mask &= df["base_m"].ge(base)
+        if well is not None:
+            mask &= df["well"].astype(str).str.contains(well, case=False, regex=False)
+        return df[mask]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Header-only catalog of LAS files.")
+    parser.add_argument(
+        "directory", help="Directory scanned recursively for .las files"
+    )
+    parser.add_argument(
+        "--index", help="Index file (default <directory>/.las_catalog.json)"
+    )
+    parser.add_argument("--curves", nargs="+", help="Required curves (e.g. DT GR)")
+    parser.add_argument("--top", type=float, help="Top of the interval to cover (m)")
+    parser.add_argument("--base", type=float, help="Base of the interval to cover (m)")
+    parser.add_argument("--well", help="Substring of the well name")
+    args = parser.parse_args(argv)
+
+    catalog = LASCatalog(args.directory, args.index).refresh()
+    for path, error in catalog.errors.items():
+        print(f"ERROR {path}: {error}", file=sys.stderr)
+    result = catalog.query(args.curves, args.top, args.base, args.well)
+    if result.empty:
+        print("No matching LAS files.")
+        return 1
+    columns = ["path", "well", "top_m", "base_m", "step", "curves"]
+    print(result[columns].to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
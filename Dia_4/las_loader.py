@@ -1,7 +1,163 @@
 import lasio
+import numpy as np
 import pandas as pd
 import os
 import io
+import mmap
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from las_pyramid import CurvePyramid
+
+
+# ~A data sections larger than this are parsed in parallel chunks
+PARALLEL_MIN_BYTES = 64 * 2**20
+CHUNK_BYTES = 16 * 2**20
+
+_DATA_SECTION = re.compile(rb"^[ \t]*~A[^\n]*\n?", re.IGNORECASE | re.MULTILINE)
+
+
+def _parse_values(data, ncols):
+    """
+    Parses whitespace-separated numbers into a (rows, ncols) array.
+    Returns None if the block holds anything else (text values, comments,
+    a different number of values per row), so the caller can fall back to
+    lasio.
+    """
+    with warnings.catch_warnings():
+        # NumPy warns (instead of failing) when it meets a non-numeric token
+        warnings.simplefilter("error")
+        try:
+            values = np.fromstring(data, sep=" ")
+        except (DeprecationWarning, ValueError):
+            return None
+    if values.size % ncols:
+        return None
+    return values.reshape(-1, ncols)
+
+
+def _parse_file_range(path, start, stop, ncols):
+    # Worker task: each process reads its own byte range of the file
+    with open(path, "rb") as f:
+        f.seek(start)
+        return _parse_values(f.read(stop - start), ncols)
+
+
+def _line_ranges(buffer, start, stop, chunk_bytes):
+    """Splits buffer[start:stop] into ranges of ~chunk_bytes ending at a newline."""
+    ranges = []
+    while start < stop:
+        end = buffer.find(b"\n", min(start + chunk_bytes, stop))
+        end = stop if end < 0 or end >= stop else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _parse_data_section(buffer, start, ncols, path=None, workers=None):
+    """
+    Parses the ~A section (buffer[start:]) into one 2D array. Large sections
+    are split into line-aligned chunks, parsed by a process pool when the
+    file is on disk (each worker reads its own range) or by a thread pool
+    for in-memory uploads. Returns None if any chunk cannot be parsed.
+    """
+    stop = len(buffer)
+    workers = workers or os.cpu_count() or 1
+    if stop - start < PARALLEL_MIN_BYTES or workers == 1:
+        return _parse_values(buffer[start:stop], ncols)
+
+    ranges = _line_ranges(buffer, start, stop, CHUNK_BYTES)
+    if path is not None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_parse_file_range, path, a, b, ncols) for a, b in ranges
+            ]
+            parts = [f.result() for f in futures]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(
+                pool.map(lambda r: _parse_values(buffer[r[0] : r[1]], ncols), ranges)
+            )
+    if any(part is None for part in parts):
+        return None
+    return np.concatenate(parts)
+
+
+def decode_las_text(content):
+    """Decodes the bytes of a LAS file (UTF-8, else Latin-1)."""
+    try:
+        return content.decode("utf-8", errors="replace")
+    except UnicodeDecodeError:
+        return content.decode("latin-1")
+
+
+def read_las(file_source, workers=None):
+    """
+    Reads a LAS file (path, bytes or file-like object) into a lasio LASFile.
+
+    Fast path: the header sections are parsed by lasio, but the ~A data
+    section is parsed straight from the raw bytes into a NumPy array (in
+    parallel chunks for large files) instead of through lasio's Python
+    parser. Files are memory-mapped, so the data is never decoded to one
+    big string. Wrapped files, or data that is not purely numeric, fall
+    back to lasio.read.
+    """
+    if isinstance(file_source, (str, os.PathLike)):
+        path = os.fspath(file_source)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return lasio.read(path)
+            # Unmapped (and the file released) even if parsing fails
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return _read_buffer(buffer, path, workers)
+
+    if isinstance(file_source, (bytes, bytearray)):
+        buffer = bytes(file_source)
+    else:
+        # File-like object (e.g. Streamlit UploadedFile)
+        if hasattr(file_source, "getvalue"):
+            buffer = file_source.getvalue()
+        else:
+            if hasattr(file_source, "seek"):
+                file_source.seek(0)
+            buffer = file_source.read()
+        if isinstance(buffer, str):
+            return lasio.read(io.StringIO(buffer))
+    return _read_buffer(buffer, None, workers)
+
+
+def _read_buffer(buffer, path, workers):
+    # read_las on the raw bytes (or memory map) of a LAS file; `path` lets
+    # large data sections be parsed by worker processes
+    match = _DATA_SECTION.search(buffer)
+    las = None
+    if match is not None:
+        header = decode_las_text(buffer[: match.start()])
+        las = lasio.read(io.StringIO(header), ignore_data=True)
+        wrapped = (
+            "WRAP" in las.version
+            and str(las.version["WRAP"].value).strip().upper() == "YES"
+        )
+        ncols = len(las.curves)
+        data = None
+        if not wrapped and ncols:
+            data = _parse_data_section(buffer, match.end(), ncols, path, workers)
+        if data is None:
+            las = None
+        else:
+            null = las.well["NULL"].value if "NULL" in las.well else None
+            if null is not None:
+                try:
+                    data[data == float(null)] = np.nan
+                except (TypeError, ValueError):
+                    pass
+            las.set_data(data)
+
+    if las is None:
+        # Odd file: let lasio parse everything
+        las = lasio.read(io.StringIO(decode_las_text(bytes(buffer))))
+    return las
 
 
 class LASHandler:
@@ -12,80 +168,132 @@ class LASHandler:
     def __init__(self):
         self.las = None
         self.filepath = None
+        self.store = None
+        self._reset_cache()
+
+    def _reset_cache(self):
+        # Curve arrays materialized so far ({mnemonic: array}) and the last
+        # DataFrame built from them, with the curves it holds
+        self._columns = {}
+        self._frame = None
+        self._frame_curves = None
+        # Min/max pyramids of the curves drawn so far ({mnemonic: CurvePyramid})
+        self._pyramids = {}
 
     def load_file(self, file_source):
         """
         Loads a LAS file from a filepath or a file-like object.
         """
         try:
-            # lasio.read accepts both strings (paths) and file-like objects
-            # If it's a Streamlit UploadedFile, it might need to be read as string or bytes depending on lasio version,
-            # but usually passing the object directly works if it has .read()
-            # For robust handling with Streamlit UploadedFile (which is bytes-like), we pass it directly.
-
-            # If it's a bytes object (sometimes needed if specific encoding issues), we might decode,
-            # but lasio handles standard inputs well.
-
             if hasattr(file_source, "name"):
                 self.filepath = file_source.name  # Use the filename
             else:
                 self.filepath = str(file_source)
 
-            # If file_source is a file path (str), read directly
-            if isinstance(file_source, str):
-                self.las = lasio.read(file_source)
-            else:
-                # Assuming file-like object (e.g. Streamlit UploadedFile)
-                # Reset pointer to start
-                if hasattr(file_source, "seek"):
-                    file_source.seek(0)
-
-                content = file_source.read()
-
-                # If bytes, decode to string
-                if isinstance(content, bytes):
-                    # Try common encodings for LAS files
-                    try:
-                        file_content_str = content.decode("utf-8", errors="replace")
-                    except UnicodeDecodeError:
-                        file_content_str = content.decode("latin-1")
-                else:
-                    file_content_str = content
-
-                # Use StringIO to pass as text stream
-                self.las = lasio.read(io.StringIO(file_content_str))
+            # Headers via lasio, ~A data parsed from the raw bytes (see read_las)
+            self.las = read_las(file_source)
+            self.store = None
+            self._reset_cache()
 
             return True, "File loaded successfully."
         except Exception as e:
             return False, f"Error loading file: {str(e)}"
 
+    def use_store(self, store):
+        """
+        Serves the curves from a LASStore (see las_store) instead of the
+        parsed file, which is released.
+        """
+        self.las = None
+        self.store = store
+        self._reset_cache()
+
     def get_curve_names(self):
         """
         Returns a list of available curve mnemonics.
         """
+        if self.store is not None:
+            return self.store.curves
         if not self.las:
             return []
         return [curve.mnemonic for curve in self.las.curves]
 
-    def get_log_data(self):
+    def get_curve_units(self):
         """
-        Returns the log data as a Pandas DataFrame.
-        Handles null values by converting them to NaN.
+        Returns {mnemonic: unit} of every curve, from the parsed file or
+        the store.
         """
+        if self.store is not None:
+            return self.store.units
         if not self.las:
+            return {}
+        return {curve.mnemonic: curve.unit for curve in self.las.curves}
+
+    def _curve(self, mnemonic):
+        # Materializes one curve on first use and keeps it for later calls
+        if mnemonic not in self._columns:
+            if self.store is not None:
+                self._columns[mnemonic] = self.store.curve(mnemonic)
+            else:
+                self._columns[mnemonic] = self.las.curves[mnemonic].data
+        return self._columns[mnemonic]
+
+    def get_log_data(self, curves=None):
+        """
+        Returns the log data as a Pandas DataFrame: depth (first column,
+        named after the depth curve) and `curves` (None = all curves).
+        Null values are already NaN.
+
+        Only the requested curves are materialized, and each one only once:
+        asking again for the same curves returns the cached frame, and
+        adding a curve builds just that column.
+        """
+        names = self.get_curve_names()
+        if not names:
             return pd.DataFrame()
+        if curves is None:
+            curves = names[1:]
+        curves = [c for c in curves if c != names[0]]
+        missing = [c for c in curves if c not in names]
+        if missing:
+            raise KeyError(f"Curves not in file: {', '.join(missing)}")
+
+        if self._frame_curves != curves:
+            data = {name: self._curve(name) for name in [names[0], *curves]}
+            self._frame = pd.DataFrame(data, copy=False)
+            self._frame_curves = curves
+        return self._frame
 
-        df = self.las.df()
-        # Ensure depth is a column if it's the index (common in lasio)
-        if df.index.name == "DEPTH":
-            df.reset_index(inplace=True)
+    def get_depth_range(self):
+        """(top, base) of the depth curve, or None if nothing is loaded."""
+        names = self.get_curve_names()
+        if not names:
+            return None
+        depth = self._curve(names[0])
+        return float(np.nanmin(depth)), float(np.nanmax(depth))
 
-        return df
+    def get_pyramid(self, mnemonic):
+        """
+        CurvePyramid (see las_pyramid) of a curve, built the first time the
+        curve is requested and kept for the loaded file. Building every
+        pyramid at load time would materialize every curve of the file,
+        which is what the store avoids.
+        """
+        if mnemonic not in self._pyramids:
+            names = self.get_curve_names()
+            if mnemonic not in names:
+                raise KeyError(f"Curve not in file: {mnemonic}")
+            self._pyramids[mnemonic] = CurvePyramid(
+                self._curve(names[0]), self._curve(mnemonic)
+            )
+        return self._pyramids[mnemonic]
 
     def get_well_info(self):
         """
         Returns a dictionary containing well header information.
         """
+        if self.store is not None:
+            return dict(self.store.well)
         if not self.las:
             return {}
 
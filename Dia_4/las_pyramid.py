@@ -0,0 +1,130 @@
+import numpy as np
+
+
+# Samples per bucket of the finest decimated level
+LEAF_SIZE = 8
+# Buckets of a level merged into one bucket of the next (coarser) level
+LEVEL_FACTOR = 4
+# Points served per track by default (the min and max of each bucket)
+MAX_POINTS = 4000
+
+
+def _leaf(values, size):
+    # Indices of the minimum and maximum of every `size` consecutive samples
+    # (missing values ignored)
+    n = len(values)
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(buckets, size)
+    missing = np.isnan(blocks)
+    offsets = np.arange(buckets) * size
+    low = offsets + np.argmin(np.where(missing, np.inf, blocks), axis=1)
+    high = offsets + np.argmax(np.where(missing, -np.inf, blocks), axis=1)
+    return low, high
+
+
+def _merge(values, low, high, factor):
+    # Next level from the previous one: the extremes of `factor` consecutive
+    # buckets are the extremes of their extremes, so only the candidate
+    # indices are visited (O(buckets), not O(samples))
+    buckets = -(-len(low) // factor)
+    pad = buckets * factor - len(low)
+    low = np.concatenate([low, np.repeat(low[-1:], pad)]).reshape(buckets, factor)
+    high = np.concatenate([high, np.repeat(high[-1:], pad)]).reshape(buckets, factor)
+    low_values = values[low]
+    high_values = values[high]
+    rows = np.arange(buckets)
+    pick_low = np.argmin(np.where(np.isnan(low_values), np.inf, low_values), axis=1)
+    pick_high = np.argmax(
+        np.where(np.isnan(high_values), -np.inf, high_values), axis=1
+    )
+    return low[rows, pick_low], high[rows, pick_high]
+
+
+class CurvePyramid:
+    """
+    Min/max decimation pyramid of one log curve.
+
+    Level 0 groups LEAF_SIZE samples per bucket and every next level merges
+    LEVEL_FACTOR buckets, down to a single bucket. Each level keeps only the
+    indices of the minimum and maximum sample of its buckets, so the peaks
+    survive at every resolution and the whole pyramid takes about a third
+    of an index per sample.
+
+        pyramid = CurvePyramid(depth, gr)
+        depth_points, gr_points = pyramid.window(3000, 3500)
+    """
+
+    def __init__(self, depth, values, leaf=LEAF_SIZE, factor=LEVEL_FACTOR):
+        depth = np.asarray(depth, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(depth) > 1 and depth[0] > depth[-1]:
+            # Logged upwards: keep depth increasing (views, no copy)
+            depth, values = depth[::-1], values[::-1]
+        self.depth = depth
+        self.values = values
+        # Samples per bucket and (low, high) index arrays of each level
+        self.sizes = []
+        self.levels = []
+        if not len(values):
+            return
+        low, high = _leaf(values, leaf)
+        size = leaf
+        while True:
+            self.sizes.append(size)
+            self.levels.append((low, high))
+            if len(low) <= 1:
+                break
+            low, high = _merge(values, low, high, factor)
+            size *= factor
+
+    def window(self, top=None, base=None, max_points=MAX_POINTS):
+        """
+        (depth, values) to draw the curve between top and base (None = the
+        whole curve) with at most about `max_points` points: every sample if
+        they fit, else the min and max of each bucket of the finest level
+        that fits (finer levels at the window edges), plus the first and
+        last sample of the window.
+        """
+        lo = 0 if top is None else int(np.searchsorted(self.depth, top, "left"))
+        hi = (
+            len(self.depth)
+            if base is None
+            else int(np.searchsorted(self.depth, base, "right"))
+        )
+        if hi - lo <= max_points:
+            return self.depth[lo:hi], self.values[lo:hi]
+
+        buckets = max(max_points // 2, 1)
+        level = len(self.levels) - 1
+        for i, size in enumerate(self.sizes):
+            if -(-hi // size) - lo // size <= buckets:
+                level = i
+                break
+        idx = np.concatenate(([lo, hi - 1], self._extremes(lo, hi, level)))
+        idx = np.unique(idx)
+        return self.depth[idx], self.values[idx]
+
+    def _extremes(self, lo, hi, level):
+        # Indices of the min/max samples covering samples [lo, hi): the
+        # buckets of `level` that lie inside the range, and the partial
+        # buckets at both ends from the finer levels (raw samples below
+        # level 0), so a peak next to the window edges is never dropped
+        if hi <= lo:
+            return np.empty(0, dtype=np.intp)
+        if level < 0:
+            return np.arange(lo, hi)
+        size = self.sizes[level]
+        first, last = -(-lo // size), hi // size
+        if first >= last:
+            return self._extremes(lo, hi, level - 1)
+        low, high = self.levels[level]
+        return np.concatenate(
+            (
+                low[first:last],
+                high[first:last],
+                self._extremes(lo, first * size, level - 1),
+                self._extremes(last * size, hi, level - 1),
+            )
+        )
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+STORE_VERSION = 1
+# Samples per chunk of every curve
+CHUNK_ROWS = 65536
+
+
+def _encode(values, compression, level):
+    raw = np.ascontiguousarray(values, dtype="<f8")
+    if compression is None:
+        return raw.tobytes()
+    # Byte shuffle (all first bytes, then all second bytes...) before zlib:
+    # sign/exponent bytes of a log are very repetitive and compress well
+    return zlib.compress(raw.view(np.uint8).reshape(-1, 8).T.tobytes(), level)
+
+
+def _decode(buffer, rows, compression):
+    if compression is None:
+        return np.frombuffer(buffer, dtype="<f8", count=rows)
+    shuffled = np.frombuffer(zlib.decompress(buffer), dtype=np.uint8)
+    return shuffled.reshape(8, rows).T.copy().view("<f8").ravel()
+
+
+def _las_columns(source):
+    # (curves {mnemonic: array}, units, descriptions, well info) from a
+    # LASHandler, a lasio LASFile or a DataFrame whose first column is depth
+    las = getattr(source, "las", source)
+    if hasattr(las, "curves") and hasattr(las, "well"):
+        curves = {
+            c.mnemonic: np.asarray(c.data, dtype=np.float64) for c in las.curves
+        }
+        units = {c.mnemonic: c.unit for c in las.curves}
+        descr = {c.mnemonic: c.descr for c in las.curves}
+        well = {item.mnemonic: str(item.value) for item in las.well}
+        return curves, units, descr, well
+    df = source.get_log_data() if hasattr(source, "get_log_data") else source
+    if not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index()
+    curves = {col: df[col].to_numpy(dtype=np.float64) for col in df.columns}
+    return curves, {}, {}, {}
+
+
+def write_store(source, path, chunk_rows=CHUNK_ROWS, compression="zlib", level=1):
+    """
+    Converts LAS data (a LASHandler, a lasio LASFile or a DataFrame with
+    depth first) into a chunked columnar store at `path` (a directory):
+    one file per curve, made of independently compressed depth chunks of
+    `chunk_rows` samples, plus meta.json with units, well info, the byte
+    offsets of every chunk and the depth range of each chunk.
+
+    compression: "zlib" (byte-shuffled) or None. Uncompressed stores are
+    larger but are read as zero-copy memory-mapped views.
+    The store is written to a temporary directory and renamed into place.
+    """
+    curves, units, descr, well = _las_columns(source)
+    names = list(curves)
+    depth = curves[names[0]]
+    if len(depth) > 1 and depth[0] > depth[-1]:
+        # Logged upwards: store with increasing depth
+        curves = {name: values[::-1] for name, values in curves.items()}
+        depth = curves[names[0]]
+
+    rows = len(depth)
+    starts = list(range(0, rows, chunk_rows)) or [0]
+    blocks = [depth[s : s + chunk_rows] for s in starts]
+    meta = {
+        "version": STORE_VERSION,
+        "rows": rows,
+        "chunk_rows": chunk_rows,
+        "compression": compression,
+        "depth": names[0],
+        "chunk_tops": [float(np.nanmin(b, initial=np.inf)) for b in blocks],
+        "chunk_bases": [float(np.nanmax(b, initial=-np.inf)) for b in blocks],
+        "well": well,
+        "curves": {},
+    }
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".lasstore-", dir=parent)
+    try:
+        for i, name in enumerate(names):
+            filename = f"{i}.bin"
+            chunks = []
+            offset = 0
+            with open(os.path.join(tmp, filename), "wb") as f:
+                for s in starts:
+                    values = curves[name][s : s + chunk_rows]
+                    data = _encode(values, compression, level)
+                    f.write(data)
+                    chunks.append([offset, len(data)])
+                    offset += len(data)
+            meta["curves"][name] = {
+                "file": filename,
+                "unit": units.get(name, ""),
+                "descr": descr.get(name, ""),
+                "chunks": chunks,
+            }
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.rename(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return LASStore(path)
+
+
+class LASStore:
+    """
+    Reader of a store written by write_store. Only meta.json is read when
+    opening; read() memory-maps the files of the requested curves and
+    decodes only the chunks overlapping the requested depth window.
+
+        store = LASStore("pozo.lasstore")
+        store.read(["GR", "DT"], top=3000, base=3500)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported LAS store version in {path}.")
+        self.depth = self.meta["depth"]
+        self.well = self.meta["well"]
+        self.rows = self.meta["rows"]
+        self._tops = np.asarray(self.meta["chunk_tops"])
+        self._bases = np.asarray(self.meta["chunk_bases"])
+
+    @property
+    def curves(self):
+        """Curve mnemonics, depth first."""
+        return list(self.meta["curves"])
+
+    @property
+    def units(self):
+        return {name: c["unit"] for name, c in self.meta["curves"].items()}
+
+    @property
+    def depth_range(self):
+        return float(np.min(self._tops)), float(np.max(self._bases))
+
+    def _chunk_span(self, top, base):
+        # First and last+1 chunk overlapping [top, base]
+        overlap = np.ones(len(self._tops), dtype=bool)
+        if top is not None:
+            overlap &= self._bases >= top
+        if base is not None:
+            overlap &= self._tops <= base
+        hits = np.flatnonzero(overlap)
+        if not len(hits):
+            return 0, 0
+        return int(hits[0]), int(hits[-1]) + 1
+
+    def _read_curve(self, name, first, last):
+        info = self.meta["curves"][name]
+        chunk_rows = self.meta["chunk_rows"]
+        rows = min(last * chunk_rows, self.rows) - first * chunk_rows
+        if rows <= 0:
+            return np.empty(0)
+        with open(os.path.join(self.path, info["file"]), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = info["chunks"][first][0]
+        if self.meta["compression"] is None:
+            # Chunks of a curve are contiguous: one view over the whole span
+            return np.frombuffer(mapped, dtype="<f8", count=rows, offset=start)
+        parts = []
+        for i in range(first, last):
+            offset, length = info["chunks"][i]
+            n = min(chunk_rows, self.rows - i * chunk_rows)
+            parts.append(_decode(mapped[offset : offset + length], n, "zlib"))
+        mapped.close()
+        return np.concatenate(parts)
+
+    def curve(self, name):
+        """All the samples of one curve (depth increasing)."""
+        if name not in self.meta["curves"]:
+            raise KeyError(f"Curve not in store: {name}")
+        return self._read_curve(name, 0, len(self._tops))
+
+    def read(self, curves=None, top=None, base=None):
+        """
+        DataFrame with depth and `curves` (None = all) for top <= depth <=
+        base. Only the files of those curves are opened and only the chunks
+        overlapping the window are read.
+        """
+        if curves is None:
+            curves = self.curves[1:]
+        missing = [c for c in curves if c not in self.meta["curves"]]
+        if missing:
+            raise KeyError(f"Curves not in store: {', '.join(missing)}")
+
+        first, last = self._chunk_span(top, base)
+        depth = self._read_curve(self.depth, first, last)
+        lo, hi = 0, len(depth)
+        if top is not None:
+            lo = int(np.searchsorted(depth, top, side="left"))
+        if base is not None:
+            hi = int(np.searchsorted(depth, base, side="right"))
+
+        data = {self.depth: depth[lo:hi]}
+        for name in curves:
+            if name != self.depth:
+                data[name] = self._read_curve(name, first, last)[lo:hi]
+        return pd.DataFrame(data, copy=False)
+
+
+def store_dir():
+    """
+    Directory of the converted LAS stores. Can be changed with the
+    LAS_STORE_DIR environment variable.
+    """
+    return os.environ.get(
+        "LAS_STORE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "las_store")
+    )
+
+
+def cached_store(file_source, handler, directory=None):
+    """
+    Returns the LASStore of an uploaded/on-disk LAS file, keyed by the
+    SHA-256 of its content. The file is parsed (with `handler`, a
+    LASHandler) and converted only the first time it is seen.
+    """
+    if isinstance(file_source, (str, os.PathLike)):
+        with open(file_source, "rb") as f:
+            content = f.read()
+    elif hasattr(file_source, "getvalue"):
+        content = file_source.getvalue()
+    else:
+        file_source.seek(0)
+        content = file_source.read()
+    path = os.path.join(directory or store_dir(), hashlib.sha256(content).hexdigest())
+
+    if os.path.isfile(os.path.join(path, "meta.json")):
+        try:
+            return LASStore(path)
+        except ValueError:
+            pass  # Older store version: convert again
+    success, msg = handler.load_file(file_source)
+    if not success:
+        raise ValueError(msg)
+    return write_store(handler, path)
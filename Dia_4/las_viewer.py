@@ -2,6 +2,7 @@ import streamlit as st
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from las_loader import LASHandler
+from las_store import cached_store
 
 # Page Configuration
 st.set_page_config(layout="wide", page_title="LAS Log Viewer", page_icon="📈")
@@ -25,19 +26,22 @@ def main():
             uploaded_file = st.file_uploader("Upload LAS File")
 
             if uploaded_file:
-                # Load file if not already loaded or if a new file is uploaded
-                if las_handler.filepath != uploaded_file.name:
-                    success, msg = las_handler.load_file(uploaded_file)
-                    if success:
-                        st.success(f"Loaded: {uploaded_file.name}")
-                    else:
-                        st.error(msg)
+                # Load file if not already loaded or if a new file is uploaded.
+                # The LAS is parsed once and kept as a columnar store, so
+                # re-opening it (even in a new session) only reads the
+                # curves that are plotted.
+                if st.session_state.get("store_file") != uploaded_file.name:
+                    try:
+                        store = cached_store(uploaded_file, las_handler)
+                    except ValueError as e:
+                        st.error(str(e))
                         return
+                    las_handler.use_store(store)
+                    st.session_state.store_file = uploaded_file.name
+                    st.success(f"Loaded: {uploaded_file.name}")
 
-                # Curve Selection
-                curves = las_handler.get_curve_names()
-                if "DEPTH" in curves:
-                    curves.remove("DEPTH")
+                # Curve Selection (the first curve is depth)
+                curves = las_handler.get_curve_names()[1:]
 
                 # Default selection suggestion
                 default_curves = [
@@ -49,12 +53,31 @@ def main():
                 selected_curves = st.multiselect(
                     "Select Curves to Plot", curves, default=default_curves
                 )
+
+                # Visible depth window: tracks are served from the min/max
+                # pyramid level that fits it, so narrowing the window shows
+                # finer detail without sending every sample to the browser
+                depth_top, depth_base = las_handler.get_depth_range()
+                top, base = st.slider(
+                    "Depth window (m)",
+                    min_value=depth_top,
+                    max_value=depth_base,
+                    value=(depth_top, depth_base),
+                    key=f"depth_window_{st.session_state.store_file}",
+                )
+                max_points = st.number_input(
+                    "Max points per track",
+                    min_value=500,
+                    max_value=100000,
+                    value=4000,
+                    step=500,
+                )
             else:
                 st.info("Please upload a LAS file to begin.")
                 return
 
         # --- Main Content ---
-        if las_handler.las and selected_curves:
+        if selected_curves:
             # Well Info Expander
             with st.expander("ℹ️ Well Information", expanded=False):
                 well_info = las_handler.get_well_info()
@@ -63,9 +86,6 @@ def main():
                 for i, (key, value) in enumerate(well_info.items()):
                     cols[i % 4].metric(label=key, value=str(value))
 
-            # Data Preparation
-            df = las_handler.get_log_data()
-
             # Plotting with Plotly
             st.subheader("Log Visualization")
 
@@ -80,10 +100,13 @@ def main():
                 )
 
                 for i, curve in enumerate(selected_curves):
+                    # Only the selected curves are materialized (and kept
+                    # by the handler across reruns, with their pyramids)
+                    y, x = las_handler.get_pyramid(curve).window(
+                        top, base, max_points
+                    )
                     fig.add_trace(
-                        go.Scatter(
-                            x=df[curve], y=df["DEPTH"], mode="lines", name=curve
-                        ),
+                        go.Scatter(x=x, y=y, mode="lines", name=curve),
                         row=1,
                         col=i + 1,
                     )
@@ -91,11 +114,11 @@ def main():
                     fig.update_xaxes(title_text=curve, row=1, col=i + 1)
 
                 # Common Y-axis configuration (Depth)
-                # FIX: use autorange="reversed" instead of reversed=True
+                # The window is drawn base to top so depth increases downwards
                 fig.update_yaxes(
-                    title_text="Depth (m)", autorange="reversed", row=1, col=1
+                    title_text="Depth (m)", row=1, col=1
                 )  # Only first col needs label
-                fig.update_yaxes(autorange="reversed")  # All y-axes reversed
+                fig.update_yaxes(range=[base, top])  # All y-axes reversed
 
                 # Layout customization for "Modern" look
                 fig.update_layout(